@@ -0,0 +1,458 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, current_app
+from flask_login import login_required, current_user
+from models import db, User, LostItem, FoundItem, ItemMatchKey, MATCHABLE_ITEMS
+from forms import AdminCreateStudentForm, StudentImportForm
+from extensions import login_manager, login_throttle, mail_pool, request_metrics
+from emails import send_email, queue_email
+from notifications import add_notifications, create_notification
+from images import release_images
+from student_import import import_students
+from datetime import datetime, timedelta
+import hmac
+
+admin = Blueprint('admin', __name__)
+
+@admin.route('/admin')
+def admin_landing():
+    return render_template('admin_landing.html')
+
+def parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return None
+
+def count_by_status(model):
+    return dict(db.session.query(model.status, db.func.count(model.id)).group_by(model.status).all())
+
+@admin.route('/admin/dashboard')
+@login_required
+def admin_dashboard():
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    per_page = current_app.config['ADMIN_PAGE_SIZE']
+    role = request.args.get('role', '')
+    lost_status = request.args.get('lost_status', '')
+    found_status = request.args.get('found_status', '')
+    date_from = parse_date_arg('date_from')
+    date_to = parse_date_arg('date_to')
+    
+    def in_date_range(query, column):
+        if date_from:
+            query = query.filter(column >= date_from)
+        if date_to:
+            query = query.filter(column < date_to + timedelta(days=1))
+        return query
+    
+    users_query = in_date_range(User.query, User.date_created)
+    if role:
+        users_query = users_query.filter(User.role == role)
+    users = users_query.order_by(User.date_created.desc(), User.id.desc()).paginate(
+        page=request.args.get('users_page', 1, type=int), per_page=per_page, error_out=False)
+    
+    pending_approvals = User.query.filter_by(account_approved=False, role='user').order_by(User.date_created).paginate(
+        page=request.args.get('pending_page', 1, type=int), per_page=per_page, error_out=False)
+    
+    lost_query = in_date_range(LostItem.query.options(db.joinedload(LostItem.user)), LostItem.date_created)
+    if lost_status:
+        lost_query = lost_query.filter(LostItem.status == lost_status)
+    lost_items = lost_query.order_by(LostItem.date_created.desc(), LostItem.id.desc()).paginate(
+        page=request.args.get('lost_page', 1, type=int), per_page=per_page, error_out=False)
+    
+    found_query = in_date_range(FoundItem.query.options(db.joinedload(FoundItem.user)), FoundItem.date_created)
+    if found_status:
+        found_query = found_query.filter(FoundItem.status == found_status)
+    found_items = found_query.order_by(FoundItem.date_created.desc(), FoundItem.id.desc()).paginate(
+        page=request.args.get('found_page', 1, type=int), per_page=per_page, error_out=False)
+    
+    lost_by_status = count_by_status(LostItem)
+    found_by_status = count_by_status(FoundItem)
+    
+    stats = {
+        'total_users': User.query.count(),
+        'total_lost': sum(lost_by_status.values()),
+        'total_found': sum(found_by_status.values()),
+        'pending_lost': lost_by_status.get('pending', 0),
+        'pending_found': found_by_status.get('pending', 0),
+        'pending_approvals': pending_approvals.total
+    }
+    
+    def page_url(param, page):
+        args = request.args.to_dict()
+        args[param] = page
+        return url_for('admin.admin_dashboard', **args)
+    
+    return render_template('admin_dashboard.html', stats=stats, users=users, lost_items=lost_items, found_items=found_items,
+                           pending_approvals=pending_approvals, page_url=page_url, filters=request.args)
+
+@admin.route('/admin/approve-student/<int:user_id>', methods=['POST'])
+@login_required
+def admin_approve_student(user_id):
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    student = User.query.get_or_404(user_id)
+    
+    if student.role == 'admin':
+        flash('Cannot approve admin accounts!', 'error')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    if student.account_approved:
+        flash('Account is already approved!', 'info')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    student.account_approved = True
+    db.session.commit()
+    
+    send_email(student.email,
+              'Account Approved - WeLink',
+              f'Dear {student.name},\n\nYour WeLink account has been approved by the administrator!\n\nYou can now log in using:\nStudent Number: {student.student_number}\nEmail: {student.email}\n\nWelcome to WeLink - Evelyn Hone College Lost and Found System!')
+    
+    flash(f'Student {student.name} approved successfully! Confirmation email sent.', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+@admin.route('/admin/reject-student/<int:user_id>', methods=['POST'])
+@login_required
+def admin_reject_student(user_id):
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    student = User.query.get_or_404(user_id)
+    
+    if student.role == 'admin':
+        flash('Cannot reject admin accounts!', 'error')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    if student.account_approved:
+        flash('Cannot reject approved accounts!', 'error')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    send_email(student.email,
+              'Registration Not Approved - WeLink',
+              f'Dear {student.name},\n\nWe regret to inform you that your WeLink registration was not approved.\n\nPlease contact the administrator for more information.')
+    
+    db.session.delete(student)
+    db.session.commit()
+    
+    flash(f'Student registration for {student.name} has been rejected and removed.', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+@admin.route('/admin/send-email/<int:user_id>', methods=['GET', 'POST'])
+@login_required
+def admin_send_email(user_id):
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    student = User.query.get_or_404(user_id)
+    
+    if request.method == 'POST':
+        subject = request.form.get('subject')
+        message = request.form.get('message')
+        
+        if not subject or not message:
+            flash('Subject and message are required!', 'error')
+            return redirect(url_for('admin.admin_send_email', user_id=user_id))
+        
+        email_sent = send_email(student.email, subject, message)
+        
+        if email_sent:
+            flash(f'Email sent successfully to {student.name}!', 'success')
+        else:
+            flash(f'Failed to send email to {student.name}. Please check email configuration.', 'error')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('admin_send_email.html', student=student)
+
+@admin.route('/admin/create-student', methods=['GET', 'POST'])
+@login_required
+def admin_create_student():
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    form = AdminCreateStudentForm()
+    
+    if form.validate_on_submit():
+        if User.query.filter_by(student_number=form.student_number.data).first():
+            flash('Student number already exists!', 'error')
+            return redirect(url_for('admin.admin_create_student'))
+        
+        if User.query.filter_by(email=form.email.data).first():
+            flash('Email already exists!', 'error')
+            return redirect(url_for('admin.admin_create_student'))
+        
+        new_student = User(
+            student_number=form.student_number.data,
+            name=form.name.data,
+            email=form.email.data,
+            role='user',
+            must_change_password=True,
+            account_approved=True
+        )
+        new_student.set_password(form.temp_password.data)
+        db.session.add(new_student)
+        db.session.commit()
+        
+        send_email(form.email.data,
+                  'Welcome to WeLink - Evelyn Hone College',
+                  f'Your account has been created.\n\nStudent Number: {form.student_number.data}\nTemporary Password: {form.temp_password.data}\n\nYou must change your password upon first login.')
+        
+        flash(f'Student account created successfully! Temporary password: {form.temp_password.data}', 'success')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('admin_create_student.html', form=form)
+
+@admin.route('/admin/import-students', methods=['GET', 'POST'])
+@login_required
+def admin_import_students():
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    form = StudentImportForm()
+    report = None
+    
+    if form.validate_on_submit():
+        report = import_students(form.csv_file.data.stream, current_app.config['STUDENT_IMPORT_CHUNK_SIZE'])
+        
+        for student in report.created:
+            queue_email(student['email'],
+                       'Welcome to WeLink - Evelyn Hone College',
+                       f'Your account has been created.\n\nStudent Number: {student["student_number"]}\nTemporary Password: {student["temp_password"]}\n\nYou must change your password upon first login.')
+        
+        if report.missing_columns:
+            flash(f'The CSV is missing required columns: {", ".join(report.missing_columns)}', 'error')
+        else:
+            flash(f'Imported {len(report.created)} of {report.rows} students. Welcome emails are being sent.',
+                  'error' if report.errors else 'success')
+    
+    return render_template('admin_import_students.html', form=form, report=report)
+
+@admin.route('/admin/delete-student/<int:user_id>', methods=['POST'])
+@login_required
+def admin_delete_student(user_id):
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    student = User.query.get_or_404(user_id)
+    
+    if student.role == 'admin':
+        flash('Cannot delete admin accounts!', 'error')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    db.session.delete(student)
+    db.session.commit()
+    flash(f'Student {student.name} deleted successfully!', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+@admin.route('/admin/edit-student/<int:user_id>', methods=['GET', 'POST'])
+@login_required
+def admin_edit_student(user_id):
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    student = User.query.get_or_404(user_id)
+    
+    if student.role == 'admin':
+        flash('Cannot edit admin accounts!', 'error')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    if request.method == 'POST':
+        student_number = request.form.get('student_number')
+        name = request.form.get('name')
+        email = request.form.get('email')
+        reset_password = request.form.get('reset_password')
+        
+        existing_student = User.query.filter_by(student_number=student_number).first()
+        if existing_student and existing_student.id != student.id:
+            flash('Student number already exists!', 'error')
+            return redirect(url_for('admin.admin_edit_student', user_id=user_id))
+        
+        existing_email = User.query.filter_by(email=email).first()
+        if existing_email and existing_email.id != student.id:
+            flash('Email already exists!', 'error')
+            return redirect(url_for('admin.admin_edit_student', user_id=user_id))
+        
+        student.student_number = student_number
+        student.name = name
+        student.email = email
+        
+        if reset_password:
+            student.set_password(reset_password)
+            student.must_change_password = True
+            send_email(email,
+                      'Password Reset - WeLink',
+                      f'Your password has been reset by an administrator.\n\nNew Temporary Password: {reset_password}\n\nYou must change your password upon next login.')
+        
+        db.session.commit()
+        flash('Student details updated successfully!', 'success')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('admin_edit_student.html', student=student)
+
+@admin.route('/admin/update-item/<item_type>/<int:item_id>/<action>', methods=['POST'])
+@login_required
+def admin_update_item(item_type, item_id, action):
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if item_type == 'lost':
+        item = LostItem.query.get_or_404(item_id)
+    else:
+        item = FoundItem.query.get_or_404(item_id)
+    
+    if action == 'approve':
+        item.status = 'approved'
+        create_notification(item.user_id, f'Your {item_type} item "{item.item_name}" has been approved!')
+    elif action == 'delete':
+        db.session.delete(item)
+        db.session.commit()
+        flash('Item deleted successfully!', 'success')
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    db.session.commit()
+    flash(f'Item {action}d successfully!', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+def moderate_items(item_type, item_ids, action):
+    """
+    Approve or delete many items of one type with set-based statements and
+    return the ids that changed plus the notifications to send. Only
+    pending items are approved; returned and claimed ones are left as they
+    are. Bulk
+    statements skip the mapper events, so match keys and image references
+    are updated here; the FTS triggers run in the database as usual.
+    """
+    model = MATCHABLE_ITEMS[item_type]
+    if action == 'approve':
+        rows = db.session.execute(
+            db.select(model.id, model.user_id, model.item_name)
+            .where(model.id.in_(item_ids), model.status == 'pending')
+        ).all()
+        changed = [row.id for row in rows]
+        if changed:
+            db.session.execute(
+                db.update(model).where(model.id.in_(changed), model.status == 'pending').values(status='approved')
+            )
+            ItemMatchKey.discard(item_type, changed)
+        notifications = [(row.user_id, f'Your {item_type} item "{row.item_name}" has been approved!') for row in rows]
+        return changed, notifications
+    
+    rows = db.session.execute(db.select(model.id, model.image_path).where(model.id.in_(item_ids))).all()
+    changed = [row.id for row in rows]
+    if changed:
+        db.session.execute(db.delete(model).where(model.id.in_(changed)))
+        ItemMatchKey.discard(item_type, changed)
+        release_images(db.session, [row.image_path for row in rows])
+    return changed, []
+
+@admin.route('/admin/items/batch', methods=['POST'])
+@login_required
+def admin_batch_items():
+    """
+    Approve or delete many lost and found items in one request. Takes JSON
+    like {"action": "approve", "lost": [1, 2], "found": [7]}.
+    """
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    payload = request.get_json(silent=True) or {}
+    action = payload.get('action')
+    if action not in ('approve', 'delete'):
+        return jsonify({'error': 'action must be "approve" or "delete"'}), 400
+    
+    limit = current_app.config['ADMIN_BATCH_LIMIT']
+    selected = {}
+    for item_type in MATCHABLE_ITEMS:
+        ids = payload.get(item_type) or []
+        if not isinstance(ids, list):
+            return jsonify({'error': f'{item_type} must be a list of item ids'}), 400
+        if len(ids) > limit:
+            return jsonify({'error': f'At most {limit} {item_type} items per request'}), 400
+        # type() rather than isinstance(), which would take JSON true/false as 1 and 0.
+        if not all(type(item_id) is int for item_id in ids):
+            return jsonify({'error': f'{item_type} must be a list of item ids'}), 400
+        selected[item_type] = sorted(set(ids))
+    
+    result = {'success': True, 'action': action}
+    notifications = []
+    for item_type, ids in selected.items():
+        changed, item_notifications = moderate_items(item_type, ids, action) if ids else ([], [])
+        result[item_type] = changed
+        notifications.extend(item_notifications)
+    add_notifications(notifications)
+    db.session.commit()
+    
+    result['notifications'] = len(notifications)
+    return jsonify(result)
+
+@admin.route('/admin/login-throttle', methods=['GET'])
+@login_required
+def login_throttle_stats():
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    return jsonify(login_throttle.metrics())
+
+@admin.route('/admin/metrics', methods=['GET'])
+def admin_metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    scraper = bool(token) and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())
+    if not scraper:
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if current_user.role != 'admin':
+            flash('Access denied!', 'error')
+            return redirect(url_for('items.dashboard'))
+    
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@admin.route('/admin/test-email', methods=['GET'])
+@login_required
+def test_email_config():
+    if current_user.role != 'admin':
+        flash('Access denied!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    mail_password = current_app.config.get('MAIL_PASSWORD', '')
+    diagnostics = {
+        'username': current_app.config.get('MAIL_USERNAME'),
+        'sender': current_app.config.get('MAIL_DEFAULT_SENDER'),
+        'server': current_app.config.get('MAIL_SERVER'),
+        'port': current_app.config.get('MAIL_PORT'),
+        'tls': current_app.config.get('MAIL_USE_TLS'),
+        'ssl': current_app.config.get('MAIL_USE_SSL'),
+        'password_set': bool(mail_password),
+        'password_length': len(mail_password) if mail_password else 0,
+        'has_spaces': ' ' in mail_password if mail_password else False
+    }
+    
+    test_result = "Not tested"
+    server = None
+    try:
+        server = mail_pool.open_connection()
+        test_result = "✅ Connection successful! Email credentials are working."
+    except Exception as e:
+        test_result = f"❌ Connection failed: {str(e)}"
+    finally:
+        if server:
+            try:
+                server.quit()
+            except:
+                pass
+    
+    diagnostics['test_result'] = test_result
+    
+    return jsonify(diagnostics)
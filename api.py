@@ -0,0 +1,194 @@
+import hashlib
+from flask import Blueprint, request, jsonify, url_for, current_app
+from flask_login import current_user
+from models import db, User, LostItem, FoundItem, Post, PostLike, Notification
+from images import variant_path
+from table_versions import table_versions
+
+api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _image_url(image_path):
+    return url_for('items.serve_upload', filename=variant_path(image_path, 'card')) if image_path else None
+
+
+class Field:
+    def __init__(self, expression, format=None, joins_user=False, tables=()):
+        self.expression = expression
+        self.format = format
+        self.joins_user = joins_user
+        self.tables = tables
+
+
+def item_fields(model, date_column):
+    return {
+        'id': Field(model.id),
+        'item_name': Field(model.item_name),
+        'category': Field(model.category),
+        'color': Field(model.color),
+        'model': Field(model.model),
+        'size': Field(model.size),
+        'description': Field(model.description),
+        date_column.key: Field(date_column, _iso),
+        'location': Field(model.location),
+        'status': Field(model.status),
+        'image_url': Field(model.image_path, _image_url),
+        'user_id': Field(model.user_id),
+        'user_name': Field(User.name, joins_user=True),
+        'date_created': Field(model.date_created, _iso),
+    }
+
+
+def post_fields(user_id):
+    return {
+        'id': Field(Post.id),
+        'content': Field(Post.content),
+        'image_url': Field(Post.image_path, _image_url),
+        'likes_count': Field(Post.likes_count),
+        'comments_count': Field(Post.comments_count),
+        'liked': Field(db.exists().where(PostLike.post_id == Post.id, PostLike.user_id == user_id),
+                       tables=(PostLike.__tablename__,)),
+        'user_id': Field(Post.user_id),
+        'user_name': Field(User.name, joins_user=True),
+        'date_created': Field(Post.date_created, _iso),
+    }
+
+
+NOTIFICATION_FIELDS = {
+    'id': Field(Notification.id),
+    'message': Field(Notification.message),
+    'is_read': Field(Notification.is_read),
+    'date_created': Field(Notification.date_created, _iso),
+}
+
+
+def _error(message, status=400):
+    return jsonify({'error': message}), status
+
+
+def _digest(value):
+    return hashlib.blake2b(repr(value).encode(), digest_size=16).hexdigest()
+
+
+def _not_modified(etag):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _page_size():
+    default = current_app.config['API_PAGE_SIZE']
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        return None
+    return max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+
+def list_rows(model, fields, default_fields, filters=()):
+    """
+    One page of model rows, newest first, as {"data": [...], "next_cursor"}.
+
+    ?fields= picks which fields are selected, ?cursor= continues from a
+    previous page's next_cursor (rows with a lower id) and ?limit= sets the
+    page size. The ETag is a digest of the request and the versions of the
+    tables it reads (see table_versions.py), so a client repeating it with
+    If-None-Match gets a 304 without the rows being queried until one of
+    those tables changes. Without the version triggers it falls back to a
+    digest of the fetched rows, which saves bandwidth but not the query.
+    """
+    requested = [name.strip() for name in request.args.get('fields', '').split(',') if name.strip()] or default_fields
+    unknown = [name for name in requested if name not in fields]
+    if unknown:
+        return _error(f'Unknown fields: {", ".join(unknown)}. Available: {", ".join(fields)}')
+
+    limit = _page_size()
+    if limit is None:
+        return _error('limit must be a number')
+
+    cursor = request.args.get('cursor')
+    if cursor and not cursor.isdigit():
+        return _error('cursor must come from a previous next_cursor')
+
+    tables = {model.__tablename__}
+    for name in requested:
+        tables.update(fields[name].tables)
+        if fields[name].joins_user:
+            tables.add(User.__tablename__)
+    versions = table_versions(tables)
+    etag = None
+    if versions is not None:
+        etag = _digest((request.path, sorted(request.args.items(multi=True)), current_user.get_id(), versions))
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
+    query = db.select(model.id.label('_cursor'), *[fields[name].expression.label(name) for name in requested])
+    if any(fields[name].joins_user for name in requested):
+        query = query.join(User, User.id == model.user_id)
+    query = query.where(*filters)
+
+    if cursor:
+        query = query.where(model.id < int(cursor))
+
+    rows = db.session.execute(query.order_by(model.id.desc()).limit(limit + 1)).all()
+    next_cursor = str(rows[limit - 1]._cursor) if len(rows) > limit else None
+    rows = rows[:limit]
+
+    if etag is None:
+        etag = _digest((requested, [tuple(row) for row in rows], next_cursor))
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
+    data = []
+    for row in rows:
+        values = row._mapping
+        data.append({name: fields[name].format(values[name]) if fields[name].format else values[name]
+                     for name in requested})
+    response = jsonify({'data': data, 'next_cursor': next_cursor})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api.before_request
+def require_login():
+    if not current_user.is_authenticated:
+        return _error('Authentication required', 401)
+
+
+def _status_filter(model):
+    status = request.args.get('status')
+    return [model.status == status] if status else []
+
+
+@api.route('/lost-items')
+def lost_items():
+    fields = item_fields(LostItem, LostItem.date_lost)
+    return list_rows(LostItem, fields, ['id', 'item_name', 'location', 'date_lost', 'status', 'image_url'],
+                     _status_filter(LostItem))
+
+
+@api.route('/found-items')
+def found_items():
+    fields = item_fields(FoundItem, FoundItem.date_found)
+    return list_rows(FoundItem, fields, ['id', 'item_name', 'location', 'date_found', 'status', 'image_url'],
+                     _status_filter(FoundItem))
+
+
+@api.route('/posts')
+def posts():
+    return list_rows(Post, post_fields(current_user.id),
+                     ['id', 'content', 'image_url', 'likes_count', 'comments_count', 'liked', 'user_name', 'date_created'])
+
+
+@api.route('/notifications')
+def notifications():
+    filters = [Notification.user_id == current_user.id]
+    if request.args.get('unread') in ('1', 'true'):
+        filters.append(Notification.is_read == False)
+    return list_rows(Notification, NOTIFICATION_FIELDS, list(NOTIFICATION_FIELDS), filters)
@@ -0,0 +1,190 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_user, logout_user, login_required, current_user
+from models import db, User
+from forms import RegisterForm, ChangePasswordForm
+from identity_cache import identity_cache
+from extensions import login_manager, login_throttle
+from emails import send_email
+from images import allowed_file, save_image_upload
+
+auth = Blueprint('auth', __name__)
+
+@login_manager.user_loader
+def load_user(user_id):
+    return identity_cache.load(int(user_id))
+
+@auth.before_app_request
+def check_password_change():
+    if current_user.is_authenticated and current_user.must_change_password:
+        allowed_endpoints = ['auth.change_password', 'auth.logout', 'static']
+        if request.endpoint not in allowed_endpoints:
+            return redirect(url_for('auth.change_password'))
+
+def find_login_user(identifier):
+    """
+    Look a user up by email or student number in one query, preferring an
+    email match.
+    """
+    if not identifier:
+        return None
+    return User.query.filter(
+        db.or_(User.email == identifier, User.student_number == identifier)
+    ).order_by((User.email == identifier).desc()).first()
+
+def rehash_if_outdated(user, password):
+    """
+    Store a new hash for a just-verified password if the old one was made
+    with a different PASSWORD_HASH_METHOD.
+    """
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+
+@auth.route('/')
+def index():
+    return render_template('index.html')
+
+@auth.route('/register', methods=['GET', 'POST'])
+def register():
+    form = RegisterForm()
+    
+    if form.validate_on_submit():
+        if User.query.filter_by(student_number=form.student_number.data).first():
+            flash('Student number already registered!', 'error')
+            return redirect(url_for('auth.register'))
+        
+        if User.query.filter_by(email=form.email.data).first():
+            flash('Email already registered!', 'error')
+            return redirect(url_for('auth.register'))
+        
+        user = User(
+            student_number=form.student_number.data, 
+            name=form.name.data, 
+            email=form.email.data, 
+            role='user',
+            account_approved=False
+        )
+        user.set_password(form.password.data)
+        db.session.add(user)
+        db.session.commit()
+        
+        send_email(form.email.data,
+                  'Registration Received - WeLink',
+                  f'Welcome to WeLink, {form.name.data}!\n\nYour registration has been received. Your account is pending admin approval.\n\nYou will receive an email confirmation once your account has been approved.')
+        
+        flash('Registration successful! Your account is pending admin approval. You will receive an email once approved.', 'success')
+        return redirect(url_for('auth.login'))
+    
+    return render_template('register.html', form=form)
+
+@auth.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        identifier = request.form.get('identifier')
+        password = request.form.get('password')
+        
+        retry_after = login_throttle.check(request.remote_addr, identifier)
+        if retry_after:
+            flash(f'Too many login attempts. Please try again in {retry_after} seconds.', 'error')
+            return render_template('student_login.html'), 429, {'Retry-After': str(retry_after)}
+        
+        user = find_login_user(identifier)
+        
+        if user and user.check_password(password):
+            login_throttle.refund(request.remote_addr, identifier)
+            rehash_if_outdated(user, password)
+            
+            if user.role == 'admin':
+                flash('Please use the admin login page.', 'error')
+                return redirect(url_for('auth.admin_login'))
+            
+            if not user.account_approved:
+                flash('Your account is pending admin approval. Please wait for approval.', 'error')
+                return redirect(url_for('auth.login'))
+            
+            login_user(user)
+            if user.must_change_password:
+                return redirect(url_for('auth.change_password'))
+            return redirect(url_for('items.dashboard'))
+        else:
+            flash('Invalid credentials!', 'error')
+    
+    return render_template('student_login.html')
+
+@auth.route('/admin/login', methods=['GET', 'POST'])
+def admin_login():
+    if request.method == 'POST':
+        identifier = request.form.get('identifier')
+        password = request.form.get('password')
+        
+        retry_after = login_throttle.check(request.remote_addr, identifier)
+        if retry_after:
+            flash(f'Too many login attempts. Please try again in {retry_after} seconds.', 'error')
+            return render_template('admin_login.html'), 429, {'Retry-After': str(retry_after)}
+        
+        user = find_login_user(identifier)
+        
+        if user and user.check_password(password):
+            login_throttle.refund(request.remote_addr, identifier)
+            rehash_if_outdated(user, password)
+            
+            if user.role != 'admin':
+                flash('Access denied! Admin credentials required.', 'error')
+                return redirect(url_for('auth.admin_login'))
+            
+            login_user(user)
+            if user.must_change_password:
+                return redirect(url_for('auth.change_password'))
+            return redirect(url_for('admin.admin_dashboard'))
+        else:
+            flash('Invalid admin credentials!', 'error')
+    
+    return render_template('admin_login.html')
+
+@auth.route('/change-password', methods=['GET', 'POST'])
+@login_required
+def change_password():
+    form = ChangePasswordForm()
+    
+    if form.validate_on_submit():
+        if not current_user.check_password(form.current_password.data):
+            flash('Current password is incorrect!', 'error')
+            return redirect(url_for('auth.change_password'))
+        
+        current_user.set_password(form.new_password.data)
+        current_user.must_change_password = False
+        db.session.commit()
+        
+        flash('Password changed successfully!', 'success')
+        if current_user.role == 'admin':
+            return redirect(url_for('admin.admin_dashboard'))
+        return redirect(url_for('items.dashboard'))
+    
+    return render_template('change_password.html', form=form)
+
+@auth.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('auth.index'))
+
+@auth.route('/profile', methods=['GET', 'POST'])
+@login_required
+def profile():
+    if current_user.role == 'admin':
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    if request.method == 'POST':
+        if 'profile_picture' in request.files:
+            file = request.files['profile_picture']
+            image_path = save_image_upload(file) if file and allowed_file(file.filename) else None
+            if image_path:
+                current_user.profile_picture = image_path
+                db.session.commit()
+                flash('Profile picture updated successfully!', 'success')
+            else:
+                flash('Invalid file type. Please upload an image.', 'error')
+        
+        return redirect(url_for('auth.profile'))
+    
+    return render_template('profile.html')
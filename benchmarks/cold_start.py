@@ -0,0 +1,138 @@
+"""
+How long a new worker takes to serve its first request.
+
+    python -m benchmarks.cold_start --runs 20
+    python -m benchmarks.cold_start --mode fork --path /login --output cold.json
+
+spawn starts a fresh interpreter per run, as a server without --preload
+does, and times the import of wsgi (which builds the app) and the first
+request separately. fork imports wsgi once in this process and forks a
+child per run, as gunicorn --preload does, and times the child from the
+fork to its first response. Both report the modules that should only load
+on first use (smtplib, the email classes, Pillow) if a run imported them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import percentile
+
+LAZY_MODULES = ['smtplib', 'email.mime.text', 'email.mime.multipart', 'PIL.Image']
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+import wsgi
+imported = time.perf_counter()
+response = wsgi.app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+if response.status_code >= 500:
+    raise SystemExit(f'{sys.argv[1]} returned {response.status_code}')
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (served - imported) * 1000,
+    'modules': len(sys.modules),
+    'lazy_loaded': [name for name in sys.argv[2:] if name in sys.modules],
+}))
+'''
+
+
+def spawn_once(path, env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', CHILD, path, *LAZY_MODULES],
+                            env=env, capture_output=True, text=True)
+    total = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample['total_ms'] = total * 1000
+    return sample
+
+
+def fork_once(app, path):
+    read_end, write_end = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        status = app.test_client().get(path).status_code
+        sample = {
+            'first_request_ms': (time.perf_counter() - started) * 1000,
+            'status': status,
+            'lazy_loaded': [name for name in LAZY_MODULES if name in sys.modules],
+        }
+        os.write(write_end, json.dumps(sample).encode())
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as pipe:
+        output = pipe.read()
+    os.waitpid(pid, 0)
+    sample = json.loads(output)
+    if sample.pop('status') >= 500:
+        raise RuntimeError(f'{path} returned a server error')
+    sample['total_ms'] = (time.perf_counter() - started) * 1000
+    return sample
+
+
+def summarize(samples):
+    summary = {}
+    for key in ('import_ms', 'first_request_ms', 'total_ms'):
+        values = [sample[key] for sample in samples if key in sample]
+        if values:
+            summary[key] = {
+                'p50': percentile(values, 0.50),
+                'p90': percentile(values, 0.90),
+                'mean': statistics.mean(values),
+                'max': max(values),
+            }
+    summary['lazy_loaded'] = sorted({name for sample in samples for name in sample['lazy_loaded']})
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=['spawn', 'fork'], default='spawn')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/login', help='the first request each worker serves')
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args(argv)
+
+    if args.mode == 'fork' and not hasattr(os, 'fork'):
+        parser.error('--mode fork needs os.fork()')
+
+    # Migrate a throwaway database first, as a deploy would before starting workers.
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + database)
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi', 'upgrade-db'],
+                   env=env, check=True, capture_output=True)
+
+    if args.mode == 'spawn':
+        spawn_once(args.path, env)  # Fill the bytecode cache so every run starts equally warm.
+        samples = [spawn_once(args.path, env) for _ in range(args.runs)]
+    else:
+        os.environ.update(env)
+        import wsgi
+        samples = [fork_once(wsgi.app, args.path) for _ in range(args.runs)]
+
+    summary = summarize(samples)
+    for key in ('import_ms', 'first_request_ms', 'total_ms'):
+        if key in summary:
+            print(f'{key:<18}p50 {summary[key]["p50"]:>8.1f} ms  p90 {summary[key]["p90"]:>8.1f} ms  '
+                  f'max {summary[key]["max"]:>8.1f} ms')
+    print('lazy modules loaded: ' + (', '.join(summary['lazy_loaded']) or 'none'))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'mode': args.mode, 'runs': args.runs, 'path': args.path,
+                       'summary': summary, 'samples': samples}, f, indent=2)
+        print(f'Report written to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
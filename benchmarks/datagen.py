@@ -0,0 +1,227 @@
+"""
+Seeded synthetic data for the benchmarks.
+
+    python -m benchmarks.datagen --scale 100k --database /tmp/welink-100k.db
+
+The same --scale and --seed always produce the same rows, so reports from
+different commits are measured against identical data. Rows are written
+with bulk INSERTs; the counters and match keys those skip are rebuilt
+afterwards, and the FTS triggers keep the search index in step.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+PASSWORD = 'Benchmark-Passw0rd!'
+CHUNK_SIZE = 5000
+BASE_TIME = datetime(2025, 1, 1)
+
+# Share of the total row count that goes to each table.
+TABLE_SHARES = {
+    'users': 0.02,
+    'lost_items': 0.08,
+    'found_items': 0.08,
+    'posts': 0.10,
+    'comments': 0.30,
+    'post_likes': 0.22,
+    'notifications': 0.20,
+}
+
+ITEM_NAMES = ['phone', 'laptop', 'wallet', 'backpack', 'keys', 'student card', 'water bottle', 'umbrella',
+              'calculator', 'headphones', 'charger', 'jacket', 'notebook', 'glasses', 'watch', 'textbook']
+ADJECTIVES = ['black', 'blue', 'red', 'silver', 'small', 'large', 'old', 'new', 'leather', 'green']
+LOCATIONS = ['Library', 'Main Hall', 'Cafeteria', 'Science Block', 'Sports Field', 'Hostel A', 'Hostel B',
+             'Admin Block', 'Lecture Theatre 1', 'Lecture Theatre 2', 'Parking Lot', 'Computer Lab']
+# Status and weight mix per item table; the app marks returned lost items
+# 'returned' and claimed found items 'claimed'.
+ITEM_STATUSES = {
+    'lost': (['pending', 'approved', 'returned'], [6, 3, 1]),
+    'found': (['pending', 'approved', 'claimed'], [6, 3, 1]),
+}
+CATEGORIES = ['Electronics', 'Documents', 'Clothing', 'Accessories', 'Books', 'Other']
+WORDS = ['campus', 'today', 'anyone', 'seen', 'please', 'thanks', 'found', 'lost', 'near', 'after', 'class',
+         'exam', 'meeting', 'event', 'help', 'welcome', 'library', 'weekend', 'great', 'news']
+
+
+def parse_scale(value):
+    """
+    A total row count written as 5000, 1k, 100k or 1m.
+    """
+    value = value.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1:], 1)
+    number = value[:-1] if multiplier > 1 else value
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Not a row count: {value}')
+
+
+def plan(total_rows):
+    counts = {table: max(1, int(total_rows * share)) for table, share in TABLE_SHARES.items()}
+    counts['users'] = max(counts['users'], 10)
+    counts['post_likes'] = min(counts['post_likes'], counts['posts'] * counts['users'])
+    return counts
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def _insert(model, rows):
+    from models import db
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_SIZE:
+            db.session.execute(db.insert(model), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(model), batch)
+    db.session.commit()
+
+
+def _users(rng, count, password_hash):
+    yield {
+        'student_number': 'ADMIN00001', 'name': 'Benchmark Admin', 'email': 'admin@bench.example.com',
+        'password_hash': password_hash, 'role': 'admin', 'must_change_password': False,
+        'account_approved': True, 'date_created': BASE_TIME,
+    }
+    for i in range(1, count):
+        yield {
+            'student_number': f'{2000000000 + i}',
+            'name': f'Student {i}',
+            'email': f'student{i}@bench.example.com',
+            'password_hash': password_hash,
+            'role': 'user',
+            'must_change_password': False,
+            'account_approved': rng.random() > 0.05,
+            'date_created': BASE_TIME + timedelta(minutes=i),
+        }
+
+
+def _items(rng, count, users, date_key, statuses):
+    choices, weights = statuses
+    for i in range(count):
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(ITEM_NAMES)}'
+        location = rng.choice(LOCATIONS)
+        yield {
+            'user_id': rng.randint(2, users),
+            'item_name': name,
+            'category': rng.choice(CATEGORIES),
+            'color': rng.choice(ADJECTIVES),
+            'description': f'{name.capitalize()} last seen at {location}. {_sentence(rng, 12)}',
+            date_key: date(2025, 1, 1) + timedelta(days=rng.randint(0, 364)),
+            'location': location,
+            'status': rng.choices(choices, weights=weights)[0],
+            'date_created': BASE_TIME + timedelta(seconds=i * 60 + rng.randint(0, 59)),
+        }
+
+
+def _posts(rng, count, users):
+    for i in range(count):
+        yield {
+            'user_id': rng.randint(2, users),
+            'content': _sentence(rng, rng.randint(5, 40)),
+            'date_created': BASE_TIME + timedelta(seconds=i * 30),
+        }
+
+
+def _comments(rng, count, users, posts):
+    for i in range(count):
+        post_id = rng.randint(1, posts)
+        yield {
+            'post_id': post_id,
+            'user_id': rng.randint(2, users),
+            'content': _sentence(rng, rng.randint(3, 20)),
+            'date_created': BASE_TIME + timedelta(seconds=post_id * 30 + rng.randint(1, 86400)),
+        }
+
+
+def _likes(count, users, posts):
+    # Walk (post, user) pairs in order so every like is unique.
+    for i in range(count):
+        yield {
+            'post_id': i % posts + 1,
+            'user_id': (i // posts) % (users - 1) + 2,
+            'date_created': BASE_TIME + timedelta(seconds=i),
+        }
+
+
+def _notifications(rng, count, users):
+    for i in range(count):
+        yield {
+            'user_id': rng.randint(2, users),
+            'message': f'Potential match! Someone found a "{rng.choice(ITEM_NAMES)}" at {rng.choice(LOCATIONS)}.',
+            'is_read': rng.random() < 0.7,
+            'date_created': BASE_TIME + timedelta(seconds=i * 20),
+        }
+
+
+def _rebuild_match_keys():
+    from models import db, ItemMatchKey, MATCHABLE_ITEMS
+    for item_type, model in MATCHABLE_ITEMS.items():
+        db.session.execute(db.insert(ItemMatchKey).from_select(
+            ['item_type', 'item_id', 'location_key', 'name_key'],
+            db.select(db.literal(item_type), model.id, db.func.lower(model.location), db.func.lower(model.item_name))
+            .where(model.status == 'pending')
+        ))
+    db.session.commit()
+
+
+def generate(total_rows, seed=1):
+    """
+    Fill the (empty, migrated) database of the current app context with
+    about total_rows rows. Returns the row count per table.
+    """
+    from models import db, User, LostItem, FoundItem, Post, Comment, PostLike, Notification, refresh_counters
+    from passwords import hash_password
+
+    if db.session.execute(db.select(User.id).limit(1)).first():
+        raise RuntimeError('The benchmark database already has users; generate into an empty one.')
+
+    rng = random.Random(seed)
+    counts = plan(total_rows)
+    password_hash = hash_password(PASSWORD)
+
+    _insert(User, _users(rng, counts['users'], password_hash))
+    _insert(LostItem, _items(rng, counts['lost_items'], counts['users'], 'date_lost', ITEM_STATUSES['lost']))
+    _insert(FoundItem, _items(rng, counts['found_items'], counts['users'], 'date_found', ITEM_STATUSES['found']))
+    _insert(Post, _posts(rng, counts['posts'], counts['users']))
+    _insert(Comment, _comments(rng, counts['comments'], counts['users'], counts['posts']))
+    _insert(PostLike, _likes(counts['post_likes'], counts['users'], counts['posts']))
+    _insert(Notification, _notifications(rng, counts['notifications'], counts['users']))
+
+    refresh_counters()
+    _rebuild_match_keys()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=parse_scale, default=parse_scale('1k'), help='total rows, e.g. 1k, 100k, 1m')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database', required=True, help='SQLite file to create')
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.database):
+        parser.error(f'{args.database} already exists')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(args.database)
+    from app import create_app
+    from migrations import upgrade
+
+    app = create_app()
+    started = time.perf_counter()
+    with app.app_context():
+        upgrade()
+        counts = generate(args.scale, args.seed)
+    for table, count in counts.items():
+        print(f'{table:<16}{count:>10}')
+    print(f'Generated in {time.perf_counter() - started:.1f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Latency, query counts and peak memory for the main pages.
+
+    python -m benchmarks.load --scale 100k --requests 50 --output before.json
+    python -m benchmarks.load --database /tmp/welink-100k.db --output after.json
+    python -m benchmarks.load --compare before.json after.json
+
+Each scenario drives one view through the Flask test client against a
+database from benchmarks.datagen. It is generated on every run, or with
+--database generated once into that file and copied for later runs. The
+JSON report records p50/p90/p99 wall time, SQL statements per request and
+the peak Python memory of a request, so two reports from different
+commits can be compared. SMTP is swapped for a no-op so the
+numbers measure the app rather than the mail server.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks import percentile
+from benchmarks.datagen import parse_scale, generate, ITEM_NAMES, LOCATIONS
+
+SCENARIOS = ['dashboard', 'feed', 'search', 'admin_dashboard', 'report_lost']
+COMPARED_METRICS = ['p50_ms', 'p99_ms', 'queries_mean', 'peak_memory_kb']
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        self.seconds = 0.0
+        self._started = None
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        self._started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.seconds += time.perf_counter() - self._started
+
+    def reset(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+def logged_in_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+def scenario_requests(name, iteration):
+    """
+    The (method, path, form data) of one request of a scenario. Requests
+    vary with the iteration but are the same on every run.
+    """
+    name_term = ITEM_NAMES[iteration % len(ITEM_NAMES)]
+    location = LOCATIONS[iteration % len(LOCATIONS)]
+    if name == 'search':
+        return 'GET', f'/search?q={name_term.split()[0]}&type=all', None
+    if name == 'report_lost':
+        return 'POST', '/report-lost', {
+            'item_name': f'black {name_term}',
+            'category': 'Other',
+            'color': 'black',
+            'description': f'Benchmark report of a black {name_term}.',
+            'date_lost': '2025-06-01',
+            'location': location,
+        }
+    return 'GET', {'dashboard': '/dashboard', 'feed': '/feed', 'admin_dashboard': '/admin/dashboard'}[name], None
+
+
+def run_scenario(app, counter, name, requests, warmup, student_id, admin_id):
+    client = logged_in_client(app, admin_id if name == 'admin_dashboard' else student_id)
+
+    def send(iteration):
+        method, path, data = scenario_requests(name, iteration)
+        response = client.open(path, method=method, data=data)
+        if response.status_code not in (200, 302):
+            raise RuntimeError(f'{name}: {method} {path} returned {response.status_code}')
+        if name != 'report_lost' and response.status_code != 200:
+            raise RuntimeError(f'{name}: {method} {path} redirected to {response.location}')
+
+    for iteration in range(warmup):
+        send(iteration)
+
+    samples = []
+    queries = []
+    sql_seconds = []
+    for iteration in range(requests):
+        counter.reset()
+        started = time.perf_counter()
+        send(iteration)
+        samples.append(time.perf_counter() - started)
+        queries.append(counter.count)
+        sql_seconds.append(counter.seconds)
+
+    # A separate pass, since tracing allocations slows every request down.
+    peak = 0
+    tracemalloc.start()
+    for iteration in range(min(requests, 5)):
+        tracemalloc.reset_peak()
+        send(iteration)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {
+        'requests': requests,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p90_ms': percentile(samples, 0.90) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'mean_ms': statistics.mean(samples) * 1000,
+        'max_ms': max(samples) * 1000,
+        'queries_mean': statistics.mean(queries),
+        'queries_max': max(queries),
+        'sql_ms_mean': statistics.mean(sql_seconds) * 1000,
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def run(args):
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    generate_data = not (args.database and os.path.exists(args.database))
+    if args.database and not generate_data:
+        # report_lost adds rows, so work on a copy to keep the saved data set unchanged.
+        shutil.copyfile(args.database, database)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(database)
+    os.environ['LOGIN_THROTTLE_ENABLED'] = 'false'
+    from app import create_app
+    from extensions import mail_pool
+    from migrations import upgrade
+    from models import db, User
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    mail_pool.send_message = lambda msg: None
+
+    with app.app_context():
+        upgrade()
+        started = time.perf_counter()
+        counts = generate(args.scale, args.seed) if generate_data else None
+        generate_seconds = time.perf_counter() - started if generate_data else None
+        if generate_data and args.database:
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(db.text('VACUUM INTO :path'), {'path': os.path.abspath(args.database)})
+        admin_id = db.session.execute(db.select(User.id).where(User.role == 'admin').limit(1)).scalar()
+        student_id = db.session.execute(
+            db.select(User.id).where(User.role == 'user', User.account_approved == True).order_by(User.id).limit(1)
+        ).scalar()
+        rows = {table.name: db.session.execute(db.select(db.func.count()).select_from(table)).scalar()
+                for table in db.metadata.sorted_tables}
+        counter = QueryCounter(db.engine)
+
+    commit, dirty = git_revision()
+    report = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': args.scale if generate_data else None,
+            'seed': args.seed if generate_data else None,
+            'database': args.database,
+            'generated_rows': counts,
+            'generate_seconds': generate_seconds,
+            'rows': rows,
+            'requests': args.requests,
+            'warmup': args.warmup,
+        },
+        'scenarios': {},
+    }
+    for name in args.scenarios:
+        # Keep the views' own print() logging out of the report.
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_scenario(app, counter, name, args.requests, args.warmup, student_id, admin_id)
+        report['scenarios'][name] = result
+        print(f'{name:<18}p50 {result["p50_ms"]:>8.1f} ms  p99 {result["p99_ms"]:>8.1f} ms  '
+              f'queries {result["queries_mean"]:>6.1f}  peak {result["peak_memory_kb"]:>9.0f} KiB')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Report written to {args.output}')
+    return 0
+
+
+def compare(base_path, head_path, threshold):
+    """
+    Print each metric of two reports side by side. Returns 1 when a metric
+    in head is worse than base by more than threshold (a fraction).
+    """
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+
+    regressions = 0
+    print(f'{"scenario":<18}{"metric":<16}{"base":>12}{"head":>12}{"change":>10}')
+    for name, head_result in head['scenarios'].items():
+        base_result = base['scenarios'].get(name)
+        if base_result is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = base_result[metric], head_result[metric]
+            change = (after - before) / before if before else 0.0
+            flag = '  !' if change > threshold else ''
+            regressions += bool(flag)
+            print(f'{name:<18}{metric:<16}{before:>12.1f}{after:>12.1f}{change:>+9.0%}{flag}')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=parse_scale, default=parse_scale('1k'), help='total rows, e.g. 1k, 100k, 1m')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database', help='reuse this SQLite file, generating it first if it does not exist')
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help='compare two reports instead of running')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='with --compare, the relative increase reported as a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
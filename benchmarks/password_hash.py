@@ -0,0 +1,93 @@
+"""
+Login latency for different password-hash settings.
+
+    python -m benchmarks.password_hash --requests 200 --concurrency 8
+    python -m benchmarks.password_hash --methods pbkdf2:sha256:600000 scrypt:16384:8:1 --workers 0 2
+
+Each setting logs a student in repeatedly through the Flask test client
+against a throwaway SQLite database and reports p50/p99 wall time.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import percentile
+
+DEFAULT_METHODS = ['pbkdf2:sha256:600000', 'scrypt:16384:8:1', 'scrypt:32768:8:1']
+PASSWORD = 'Benchmark-Passw0rd!'
+
+
+def run_setting(app, method, workers, requests, concurrency):
+    import passwords
+    from models import db, User
+
+    app.config['PASSWORD_HASH_METHOD'] = method
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    if passwords._executor is not None:
+        passwords._executor.shutdown()
+        passwords._executor = None
+
+    with app.app_context():
+        user = User.query.filter_by(student_number='9900000001').first()
+        user.set_password(PASSWORD)
+        db.session.commit()
+
+    def login(_):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post('/login', data={'identifier': '9900000001', 'password': PASSWORD})
+        elapsed = time.perf_counter() - started
+        if response.status_code != 302:
+            raise RuntimeError(f'Login failed with status {response.status_code}')
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(login, range(requests)))
+    return {
+        'method': method,
+        'workers': workers,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'mean_ms': statistics.mean(samples) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--workers', nargs='+', type=int, default=[0],
+                        help='PASSWORD_HASH_WORKERS values to try; 0 hashes on the request thread')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['LOGIN_THROTTLE_ENABLED'] = 'false'
+    os.environ['USER_CACHE_TTL'] = '0'
+    from app import create_app
+    from migrations import upgrade
+    from models import db, User
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        upgrade()
+        db.session.add(User(student_number='9900000001', name='Benchmark Student', email='bench@example.com',
+                            password_hash='', account_approved=True))
+        db.session.commit()
+
+    print(f'{"method":<28}{"workers":>8}{"p50 ms":>10}{"p99 ms":>10}{"mean ms":>10}')
+    for method in args.methods:
+        for workers in args.workers:
+            result = run_setting(app, method, workers, args.requests, args.concurrency)
+            print(f'{result["method"]:<28}{result["workers"]:>8}{result["p50_ms"]:>10.1f}'
+                  f'{result["p99_ms"]:>10.1f}{result["mean_ms"]:>10.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,85 @@
 import os
 
+
+def database_url(default):
+    url = os.environ.get('DATABASE_URL', default)
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
 class Config:
     SECRET_KEY = os.environ.get('SESSION_SECRET') or 'dev-secret-key-change-in-production'
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///welink.db'
+    SQLALCHEMY_DATABASE_URI = database_url('sqlite:///welink.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    # Applied to every new SQLite connection; ignored for other databases.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'synchronous': 'NORMAL',
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 20000)),
+        'temp_store': 'MEMORY',
+    }
     
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    UPLOAD_CACHE_MAX_AGE = int(os.environ.get('UPLOAD_CACHE_MAX_AGE', 365 * 24 * 60 * 60))
+    # '' serves files from Python, 'x-sendfile' or 'x-accel-redirect' hands them to a front proxy.
+    UPLOAD_SENDFILE_MODE = os.environ.get('UPLOAD_SENDFILE_MODE', '').lower()
+    UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads')
+    
+    FEED_PAGE_SIZE = int(os.environ.get('FEED_PAGE_SIZE', 10))
+    FEED_PREVIEW_COMMENTS = int(os.environ.get('FEED_PREVIEW_COMMENTS', 2))
+    COMMENTS_PAGE_SIZE = int(os.environ.get('COMMENTS_PAGE_SIZE', 20))
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 20))
+    ADMIN_BATCH_LIMIT = int(os.environ.get('ADMIN_BATCH_LIMIT', 500))
+    # Rendered post and item cards to keep; 0 turns the cache off. Set
+    # FRAGMENT_CACHE_STORAGE to a SQLite file path to share it between workers.
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 2000))
+    FRAGMENT_CACHE_STORAGE = os.environ.get('FRAGMENT_CACHE_STORAGE', '')
+    DASHBOARD_CARD_LIMIT = int(os.environ.get('DASHBOARD_CARD_LIMIT', 6))
+    SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', 12))
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 20))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 100))
+    
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 30))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    
+    # Only failed logins spend tokens; a correct password refunds them. Many
+    # students can share one address (campus NAT, a proxy without
+    # PROXY_FIX_X_FOR), so size the IP burst for the failed attempts of
+    # everyone behind it, e.g. around one per concurrent user at peak.
+    LOGIN_THROTTLE_ENABLED = os.environ.get('LOGIN_THROTTLE_ENABLED', 'True').lower() == 'true'
+    LOGIN_THROTTLE_IP_BURST = int(os.environ.get('LOGIN_THROTTLE_IP_BURST', 20))
+    LOGIN_THROTTLE_IP_PER_MINUTE = float(os.environ.get('LOGIN_THROTTLE_IP_PER_MINUTE', 10))
+    LOGIN_THROTTLE_IDENTIFIER_BURST = int(os.environ.get('LOGIN_THROTTLE_IDENTIFIER_BURST', 5))
+    LOGIN_THROTTLE_IDENTIFIER_PER_MINUTE = float(os.environ.get('LOGIN_THROTTLE_IDENTIFIER_PER_MINUTE', 2))
+    # Path to a SQLite file shared by all workers; empty keeps buckets in memory.
+    LOGIN_THROTTLE_STORAGE = os.environ.get('LOGIN_THROTTLE_STORAGE', '')
+    # Reverse proxies in front of the app whose X-Forwarded-For, -Proto and
+    # -Host are trusted. Behind nginx set 1, or every client shares the
+    # proxy's address (and its login throttle bucket). 0 trusts none.
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    
+    # Any Werkzeug method, e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000.
+    # Hashes made with other settings are upgraded at the next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    
+    # Rows per uniqueness lookup and INSERT during a CSV import; keep it
+    # under SQLite's bound-parameter limit.
+    STUDENT_IMPORT_CHUNK_SIZE = int(os.environ.get('STUDENT_IMPORT_CHUNK_SIZE', 500))
+    
+    # Each open notification stream holds a worker thread/greenlet, so
+    # streams are closed after NOTIFICATION_STREAM_DURATION seconds and the
+    # browser reconnects from the last event id it saw.
+    NOTIFICATION_STREAM_INTERVAL = float(os.environ.get('NOTIFICATION_STREAM_INTERVAL', 3))
+    NOTIFICATION_STREAM_DURATION = int(os.environ.get('NOTIFICATION_STREAM_DURATION', 60))
+    NOTIFICATION_STREAM_HEARTBEAT = int(os.environ.get('NOTIFICATION_STREAM_HEARTBEAT', 15))
+    NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 20))
     
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -16,3 +88,37 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT', 30))
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 2))
+    MAIL_POOL_IDLE_TIMEOUT = int(os.environ.get('MAIL_POOL_IDLE_TIMEOUT', 60))
+    MAIL_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100))
+    
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    # Lets a Prometheus scraper read /admin/metrics with "Authorization: Bearer <token>".
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+
+
+class DevelopmentConfig(Config):
+    pass
+
+
+class ProductionConfig(Config):
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+    SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, busy_timeout=int(os.environ.get('SQLITE_BUSY_TIMEOUT', 15000)))
+
+
+config_profiles = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+}
+
+
+def get_config(name=None):
+    return config_profiles[name or os.environ.get('WELINK_ENV', 'development')]
@@ -0,0 +1,24 @@
+from models import db
+
+
+def _apply_sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+    return on_connect
+
+
+def init_database(app):
+    """
+    Bind the SQLAlchemy extension to the app and tune its engine. SQLite
+    connections get the configured pragmas (WAL journaling, busy timeout,
+    synchronous level, cache size) as soon as they are opened; server
+    databases are used as configured through SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    db.init_app(app)
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == 'sqlite':
+            db.event.listen(engine, 'connect', _apply_sqlite_pragmas(app.config.get('SQLITE_PRAGMAS', {})))
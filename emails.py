@@ -0,0 +1,41 @@
+from flask import current_app
+from extensions import mail_pool, mail_queue
+
+
+def build_email(to, subject, body):
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    sender = current_app.config.get('MAIL_DEFAULT_SENDER') or current_app.config.get('MAIL_USERNAME')
+    
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = to
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+def queue_email(to, subject, body):
+    """
+    Send an email from the background mail queue instead of the request.
+    """
+    mail_queue.put(build_email(to, subject, body))
+
+
+def send_email(to, subject, body):
+    try:
+        msg = build_email(to, subject, body)
+        mail_pool.send_message(msg)
+        
+        print(f"Email sent successfully to {to}")
+        return True
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Email error sending to {to}: {error_msg}")
+        if "Username and Password not accepted" in error_msg or "535" in error_msg:
+            print("Authentication failed. If using Gmail, please use an App Password instead of your regular password.")
+            print("Create App Password at: https://myaccount.google.com/apppasswords")
+        elif "Connection refused" in error_msg:
+            print("Cannot connect to mail server. Check MAIL_SERVER and MAIL_PORT settings.")
+        return False
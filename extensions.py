@@ -0,0 +1,16 @@
+from flask_login import LoginManager
+from flask_wtf.csrf import CSRFProtect
+from fragments import FragmentCache
+from mailer import SMTPConnectionPool, MailQueue
+from metrics import RequestMetrics
+from throttle import LoginThrottle
+
+# Created unbound here and bound to the app in create_app(), so the
+# blueprints can import them without importing the app.
+csrf = CSRFProtect()
+login_manager = LoginManager()
+request_metrics = RequestMetrics()
+mail_pool = SMTPConnectionPool(observe=request_metrics.observe_smtp)
+mail_queue = MailQueue(mail_pool.send_message)
+login_throttle = LoginThrottle()
+fragment_cache = FragmentCache()
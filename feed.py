@@ -0,0 +1,260 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
+from flask_login import login_required, current_user
+from jinja2 import pass_context
+from models import db, Post, Comment, PostLike, CommentReaction
+from extensions import fragment_cache
+from fragments import viewer_overlay, render_post_card, render_comment
+from images import allowed_file, save_image_upload
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+feed = Blueprint('feed', __name__)
+
+@feed.app_template_global()
+@pass_context
+def post_card(context, post):
+    comments = context.get('preview_comments', {}).get(post.id, [])
+    return render_post_card(fragment_cache, viewer_overlay(context), post, comments)
+
+@feed.app_template_global()
+@pass_context
+def comment_card(context, comment):
+    return render_comment(fragment_cache, viewer_overlay(context), comment)
+
+@feed.app_template_global('comment_cursor')
+def encode_feed_cursor(row):
+    return f"{row.date_created.isoformat()}_{row.id}"
+
+def decode_feed_cursor(cursor):
+    try:
+        date_part, id_part = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (AttributeError, ValueError):
+        return None
+
+def load_feed_page(cursor=None):
+    page_size = current_app.config['FEED_PAGE_SIZE']
+    query = Post.query.options(db.selectinload(Post.user))
+    
+    position = decode_feed_cursor(cursor) if cursor else None
+    if position:
+        date_created, post_id = position
+        query = query.filter(
+            (Post.date_created < date_created) |
+            ((Post.date_created == date_created) & (Post.id < post_id))
+        )
+    
+    posts = query.order_by(Post.date_created.desc(), Post.id.desc()).limit(page_size + 1).all()
+    next_cursor = encode_feed_cursor(posts[page_size - 1]) if len(posts) > page_size else None
+    posts = posts[:page_size]
+    preview_comments = load_preview_comments([post.id for post in posts if post.comments_count])
+    comment_ids = [comment.id for comments in preview_comments.values() for comment in comments]
+    liked_post_ids, reacted_comment_ids = load_viewer_state([post.id for post in posts], comment_ids, current_user.id)
+    
+    return {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'preview_comments': preview_comments,
+        'liked_post_ids': liked_post_ids,
+        'reacted_comment_ids': reacted_comment_ids
+    }
+
+def load_preview_comments(post_ids):
+    """
+    The latest FEED_PREVIEW_COMMENTS comments of each post, oldest first,
+    with their authors, in one query.
+    """
+    limit = current_app.config['FEED_PREVIEW_COMMENTS']
+    if not post_ids or limit <= 0:
+        return {}
+    
+    ranked = db.select(
+        Comment.id,
+        db.func.row_number().over(
+            partition_by=Comment.post_id,
+            order_by=(Comment.date_created.desc(), Comment.id.desc())
+        ).label('position')
+    ).where(Comment.post_id.in_(post_ids)).subquery()
+    
+    comments = db.session.execute(
+        db.select(Comment)
+        .join(ranked, ranked.c.id == Comment.id)
+        .where(ranked.c.position <= limit)
+        .options(db.joinedload(Comment.user))
+        .order_by(Comment.date_created, Comment.id)
+    ).scalars().all()
+    
+    preview_comments = {}
+    for comment in comments:
+        preview_comments.setdefault(comment.post_id, []).append(comment)
+    return preview_comments
+
+def load_viewer_state(post_ids, comment_ids, user_id):
+    if not post_ids and not comment_ids:
+        return set(), set()
+    
+    rows = db.session.execute(db.union_all(
+        db.select(db.literal('post'), PostLike.post_id)
+        .where(PostLike.user_id == user_id, PostLike.post_id.in_(post_ids)),
+        db.select(db.literal('comment'), CommentReaction.comment_id)
+        .where(CommentReaction.user_id == user_id, CommentReaction.comment_id.in_(comment_ids))
+    )).all()
+    
+    liked_post_ids = {entity_id for kind, entity_id in rows if kind == 'post'}
+    reacted_comment_ids = {entity_id for kind, entity_id in rows if kind == 'comment'}
+    return liked_post_ids, reacted_comment_ids
+
+@feed.route('/feed')
+@login_required
+def index():
+    if current_user.role == 'admin':
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    cursor = request.args.get('cursor')
+    return render_template('feed.html', cursor=cursor, **load_feed_page(cursor))
+
+@feed.route('/feed/posts')
+@login_required
+def feed_posts():
+    page = load_feed_page(request.args.get('cursor'))
+    return jsonify({
+        'html': render_template('feed_posts.html', **page),
+        'next_cursor': page['next_cursor']
+    })
+
+@feed.route('/feed/post/<int:post_id>/comments')
+@login_required
+def post_comments(post_id):
+    page_size = current_app.config['COMMENTS_PAGE_SIZE']
+    query = db.select(Comment).where(Comment.post_id == post_id).options(db.joinedload(Comment.user))
+    
+    before = request.args.get('before')
+    if before:
+        position = decode_feed_cursor(before)
+        if not position:
+            return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+        date_created, comment_id = position
+        query = query.where(
+            (Comment.date_created < date_created) |
+            ((Comment.date_created == date_created) & (Comment.id < comment_id))
+        )
+    
+    comments = db.session.execute(
+        query.order_by(Comment.date_created.desc(), Comment.id.desc()).limit(page_size + 1)
+    ).scalars().all()
+    next_before = encode_feed_cursor(comments[page_size - 1]) if len(comments) > page_size else None
+    comments = comments[:page_size][::-1]
+    _, reacted_comment_ids = load_viewer_state([], [comment.id for comment in comments], current_user.id)
+    
+    return jsonify({
+        'html': render_template('feed_comments.html', comments=comments, reacted_comment_ids=reacted_comment_ids),
+        'next_before': next_before
+    })
+
+@feed.route('/feed/create', methods=['POST'])
+@login_required
+def create_post():
+    content = request.form.get('content')
+    
+    if not content or not content.strip():
+        flash('Post content cannot be empty!', 'error')
+        return redirect(url_for('feed.index'))
+    
+    image_path = None
+    if 'image' in request.files:
+        file = request.files['image']
+        if file and allowed_file(file.filename):
+            image_path = save_image_upload(file)
+    
+    post = Post(
+        user_id=current_user.id,
+        content=content,
+        image_path=image_path
+    )
+    db.session.add(post)
+    db.session.commit()
+    
+    flash('Post created successfully!', 'success')
+    return redirect(url_for('feed.index'))
+
+@feed.route('/feed/post/<int:post_id>/like', methods=['POST'])
+@login_required
+def like_post(post_id):
+    post = Post.query.get_or_404(post_id)
+    
+    existing_like = PostLike.query.filter_by(post_id=post_id, user_id=current_user.id).first()
+    
+    if existing_like:
+        db.session.delete(existing_like)
+        db.session.commit()
+        return jsonify({'success': True, 'liked': False, 'likes_count': post.likes_count})
+    else:
+        like = PostLike(post_id=post_id, user_id=current_user.id)
+        db.session.add(like)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        return jsonify({'success': True, 'liked': True, 'likes_count': post.likes_count})
+
+@feed.route('/feed/post/<int:post_id>/comment', methods=['POST'])
+@login_required
+def add_comment(post_id):
+    post = Post.query.get_or_404(post_id)
+    content = request.form.get('content')
+    
+    if not content or not content.strip():
+        return jsonify({'success': False, 'message': 'Comment cannot be empty'})
+    
+    comment = Comment(
+        post_id=post_id,
+        user_id=current_user.id,
+        content=content
+    )
+    db.session.add(comment)
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'comment': {
+            'id': comment.id,
+            'content': comment.content,
+            'user_name': current_user.name,
+            'date_created': comment.date_created.strftime('%B %d, %Y at %I:%M %p')
+        }
+    })
+
+@feed.route('/feed/post/<int:post_id>/delete', methods=['POST'])
+@login_required
+def delete_post(post_id):
+    post = Post.query.get_or_404(post_id)
+    
+    if post.user_id != current_user.id:
+        flash('You can only delete your own posts!', 'error')
+        return redirect(url_for('feed.index'))
+    
+    db.session.delete(post)
+    db.session.commit()
+    
+    flash('Post deleted successfully!', 'success')
+    return redirect(url_for('feed.index'))
+
+@feed.route('/feed/comment/<int:comment_id>/react', methods=['POST'])
+@login_required
+def react_to_comment(comment_id):
+    comment = Comment.query.get_or_404(comment_id)
+    
+    existing_reaction = CommentReaction.query.filter_by(comment_id=comment_id, user_id=current_user.id).first()
+    
+    if existing_reaction:
+        db.session.delete(existing_reaction)
+        db.session.commit()
+        return jsonify({'success': True, 'reacted': False, 'reactions_count': comment.reactions_count})
+    else:
+        reaction = CommentReaction(comment_id=comment_id, user_id=current_user.id)
+        db.session.add(reaction)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        return jsonify({'success': True, 'reacted': True, 'reactions_count': comment.reactions_count})
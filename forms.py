@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField
-from wtforms.validators import DataRequired, Email, Length, ValidationError, EqualTo
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms import Form, StringField, PasswordField
+from wtforms.validators import DataRequired, Email, Length, ValidationError, EqualTo, Optional
 import re
 
 
@@ -56,7 +57,11 @@ class RegisterForm(FlaskForm):
     ])
 
 
-class AdminCreateStudentForm(FlaskForm):
+class StudentDetailsForm(Form):
+    """
+    The fields every way of adding a student account checks: the admin
+    form and each row of a bulk import.
+    """
     student_number = StringField('Student Number', validators=[
         DataRequired(message='Student number is required.'),
         validate_student_number
@@ -69,6 +74,9 @@ class AdminCreateStudentForm(FlaskForm):
         DataRequired(message='Email is required.'),
         Email(message='Invalid email address.')
     ])
+
+
+class AdminCreateStudentForm(StudentDetailsForm, FlaskForm):
     temp_password = PasswordField('Temporary Password', validators=[
         DataRequired(message='Temporary password is required.'),
         validate_password_strength
@@ -87,3 +95,21 @@ class ChangePasswordForm(FlaskForm):
         DataRequired(message='Please confirm your new password.'),
         EqualTo('new_password', message='Passwords must match.')
     ])
+
+
+class StudentImportForm(FlaskForm):
+    csv_file = FileField('CSV File', validators=[
+        FileRequired(message='Please choose a CSV file.'),
+        FileAllowed(['csv'], message='Only .csv files can be imported.')
+    ])
+
+
+class StudentImportRowForm(StudentDetailsForm):
+    """
+    One CSV row of a bulk import. temp_password may be left blank to have
+    one generated.
+    """
+    temp_password = StringField('Temporary Password', validators=[
+        Optional(),
+        validate_password_strength
+    ])
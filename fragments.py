@@ -0,0 +1,254 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from flask import get_template_attribute, g, current_app
+from flask_login import current_user
+from markupsafe import Markup
+from sqlite_store import SQLiteFileStore
+
+CARDS_TEMPLATE = 'cards.html'
+
+# Placeholders left in cached cards for the parts that depend on the viewer.
+VIEWER_SLOT = re.compile(r'<!--viewer:([a-z-]+)((?::[\w-]*)*)-->')
+
+
+def _digest(value):
+    return hashlib.blake2b(repr(value).encode(), digest_size=12).hexdigest()
+
+
+def _comment_fields(comment):
+    return (comment.id, comment.content, comment.date_created, comment.reactions_count,
+            comment.user.name, comment.user.profile_picture)
+
+
+def post_version(post, comments):
+    """
+    Everything a rendered post card shows: its content, like and comment
+    counts, author and the preview comments with their authors and
+    reaction counts.
+    """
+    return _digest((
+        post.content, post.image_path, post.date_created, post.likes_count, post.comments_count,
+        post.user_id, post.user.name, post.user.profile_picture,
+        [_comment_fields(comment) for comment in comments],
+    ))
+
+
+def comment_version(comment):
+    return _digest(_comment_fields(comment))
+
+
+def item_version(item):
+    return _digest((
+        item.item_name, item.description, item.location, item.status, item.image_path,
+        item.user_id, getattr(item, 'date_lost', None) or getattr(item, 'date_found', None),
+    ))
+
+
+class MemoryFragmentStore:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def set(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteFragmentStore(SQLiteFileStore):
+    """
+    Fragments in a SQLite file shared by every worker on the host. The
+    least recently written rows beyond max_entries are pruned now and then.
+    """
+
+    PRUNE_EVERY = 200
+    SCHEMA = 'CREATE TABLE IF NOT EXISTS fragments (key TEXT PRIMARY KEY, html TEXT NOT NULL, stored REAL NOT NULL)'
+
+    def __init__(self, path, max_entries):
+        self.max_entries = max_entries
+        self._writes = 0
+        super().__init__(path)
+
+    def get(self, key):
+        row = self._connect().execute('SELECT html FROM fragments WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, html):
+        connection = self._connect()
+        connection.execute('INSERT OR REPLACE INTO fragments (key, html, stored) VALUES (?, ?, ?)', (key, html, time.time()))
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            connection.execute(
+                'DELETE FROM fragments WHERE key NOT IN (SELECT key FROM fragments ORDER BY stored DESC LIMIT ?)',
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        self._connect().execute('DELETE FROM fragments')
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM fragments').fetchone()[0]
+
+
+class _CacheState:
+    """
+    The store and hit counters of one app's fragment cache.
+    """
+
+    def __init__(self, app):
+        size = app.config.get('FRAGMENT_CACHE_SIZE', 2000)
+        storage = app.config.get('FRAGMENT_CACHE_STORAGE')
+        if size <= 0:
+            self.store = None
+        elif storage:
+            self.store = SQLiteFragmentStore(storage, size)
+        else:
+            self.store = MemoryFragmentStore(size)
+        # Tie entries to the card templates so a deploy never serves old markup.
+        sources = [app.jinja_env.loader.get_source(app.jinja_env, name)[0] for name in (CARDS_TEMPLATE, 'images.html')]
+        self.prefix = _digest(sources)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+
+class FragmentCache:
+    """
+    Caches rendered post, comment and item cards keyed by entity id and a version
+    digest of the fields the card shows, so a card is rendered again only
+    after it changes. Viewer-specific parts (like and reaction state, owner
+    controls with their CSRF token, the viewer's avatar) are kept out of
+    the cached HTML and filled into its slots on every request. Each app
+    bound with init_app has its own store, kept in
+    app.extensions['fragment_cache'].
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['fragment_cache'] = _CacheState(app)
+
+    def _state(self):
+        return current_app.extensions['fragment_cache']
+
+    def fetch(self, key, render):
+        state = self._state()
+        if state.store is None:
+            return str(render())
+        key = f'{state.prefix}:{key}'
+        html = state.store.get(key)
+        with state.lock:
+            if html is None:
+                state.misses += 1
+            else:
+                state.hits += 1
+        if html is None:
+            html = str(render())
+            state.store.set(key, html)
+        return html
+
+    def stats(self):
+        state = self._state()
+        return {'hits': state.hits, 'misses': state.misses,
+                'entries': len(state.store) if state.store is not None else 0}
+
+
+def _macro(name):
+    return get_template_attribute(CARDS_TEMPLATE, name)
+
+
+class ViewerOverlay:
+    """
+    Fills the viewer slots of cached cards for one request.
+    """
+
+    def __init__(self, user, liked_post_ids=(), reacted_comment_ids=()):
+        self.user = user
+        self.liked_post_ids = liked_post_ids
+        self.reacted_comment_ids = reacted_comment_ids
+        self._rendered = {}
+
+    # Like and react buttons are tiny and differ per viewer, so they are
+    # rendered here, once per request, rather than kept in the shared cache.
+    def _once(self, key, render):
+        if key not in self._rendered:
+            self._rendered[key] = str(render())
+        return self._rendered[key]
+
+    def _fill(self, match):
+        slot = match.group(1)
+        args = match.group(2).split(':')[1:]
+
+        if slot == 'like':
+            post_id = int(args[0])
+            liked = post_id in self.liked_post_ids
+            return self._once(f'like:{post_id}:{int(liked)}', lambda: _macro('like_button')(post_id, liked))
+        if slot == 'react':
+            comment_id, count = int(args[0]), int(args[1])
+            reacted = comment_id in self.reacted_comment_ids
+            return self._once(f'react:{comment_id}:{count}:{int(reacted)}',
+                              lambda: _macro('react_button')(comment_id, count, reacted))
+        if slot == 'post-owner':
+            post_id, owner_id = int(args[0]), int(args[1])
+            if owner_id != self.user.id:
+                return ''
+            return self._once(match.group(0), lambda: _macro('post_owner_controls')(post_id))
+        if slot == 'item-owner':
+            item_type, item_id, owner_id, status = args[0], int(args[1]), int(args[2]), args[3]
+            if owner_id != self.user.id:
+                return ''
+            return self._once(match.group(0), lambda: _macro('item_owner_controls')(item_type, item_id, status))
+        if slot == 'avatar':
+            return self._once('avatar', lambda: _macro('viewer_avatar')(self.user))
+        return ''
+
+    def apply(self, html):
+        return Markup(VIEWER_SLOT.sub(self._fill, html))
+
+
+def viewer_overlay(context):
+    """
+    The request's overlay, built from the viewer state in the context of
+    the first template that renders a card.
+    """
+    if 'viewer_overlay' not in g:
+        g.viewer_overlay = ViewerOverlay(current_user, context.get('liked_post_ids', ()),
+                                         context.get('reacted_comment_ids', ()))
+    return g.viewer_overlay
+
+
+def render_post_card(cache, overlay, post, comments):
+    html = cache.fetch(f'post:{post.id}:{post_version(post, comments)}', lambda: _macro('post_card')(post, comments))
+    return overlay.apply(html)
+
+
+def render_comment(cache, overlay, comment):
+    html = cache.fetch(f'comment:{comment.id}:{comment_version(comment)}', lambda: _macro('comment_item')(comment))
+    return overlay.apply(html)
+
+
+def render_item_card(cache, overlay, item_type, item):
+    html = cache.fetch(f'{item_type}:{item.id}:{item_version(item)}', lambda: _macro(f'{item_type}_card')(item))
+    return overlay.apply(html)
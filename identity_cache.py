@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy.orm import Session
+from models import db, User
+
+# The User columns kept in the cache: what authentication, the password
+# change check and the page chrome read on every request.
+IDENTITY_FIELDS = ('id', 'student_number', 'name', 'email', 'role',
+                   'must_change_password', 'account_approved', 'profile_picture')
+
+
+class CachedUser(UserMixin):
+    """
+    The identity fields of a User, served from the cache. Reading any other
+    attribute, or assigning one, loads the full row on first use.
+    """
+
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+        self.__dict__['_user'] = None
+
+    def _load(self):
+        user = self.__dict__['_user']
+        if user is None:
+            user = db.session.get(User, self.__dict__['id'])
+            if user is None:
+                raise LookupError(f'User {self.__dict__["id"]} no longer exists')
+            self.__dict__['_user'] = user
+        return user
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+        if name in IDENTITY_FIELDS:
+            self.__dict__[name] = value
+
+    def __repr__(self):
+        return f'<CachedUser {self.student_number}>'
+
+
+class UserIdentityCache:
+    """
+    Process-local LRU of user identity fields for the Flask-Login
+    user_loader, so most authenticated requests skip the users table.
+
+    Entries expire after USER_CACHE_TTL seconds and are dropped as soon as
+    a transaction that updates or deletes the user commits. Other worker
+    processes only see such changes once their own entry expires, so keep
+    the TTL short. A TTL of 0 turns the cache off.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 0
+        self.max_size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = float(app.config.get('USER_CACHE_TTL', 30))
+        self.max_size = int(app.config.get('USER_CACHE_SIZE', 1024))
+        app.extensions['identity_cache'] = self
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, fields = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return fields
+
+    def put(self, user):
+        fields = {name: getattr(user, name) for name in IDENTITY_FIELDS}
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, fields)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, user_id):
+        """
+        Return a CachedUser on a hit; on a miss load and cache the User.
+        """
+        if self.ttl <= 0:
+            return db.session.get(User, user_id)
+        fields = self.get(user_id)
+        if fields is not None:
+            return CachedUser(fields)
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self.put(user)
+        return user
+
+
+identity_cache = UserIdentityCache()
+
+
+def _mark_stale(mapper, connection, target):
+    session = db.inspect(target).session
+    if session is not None:
+        session.info.setdefault('stale_identities', set()).add(target.id)
+    else:
+        identity_cache.invalidate(target.id)
+
+
+db.event.listen(User, 'after_update', _mark_stale)
+db.event.listen(User, 'after_delete', _mark_stale)
+
+
+@db.event.listens_for(Session, 'after_commit')
+def _invalidate_stale_identities(session):
+    stale = session.info.pop('stale_identities', None)
+    if stale:
+        identity_cache.invalidate(*stale)
+
+
+@db.event.listens_for(Session, 'after_rollback')
+def _forget_stale_identities(session):
+    session.info.pop('stale_identities', None)
@@ -0,0 +1,236 @@
+import os
+import re
+import hashlib
+from collections import Counter
+from io import BytesIO
+from flask import current_app
+from sqlalchemy.orm import Session
+from models import db, User, LostItem, FoundItem, Post, StoredImage
+
+# Longest edge in pixels for each stored size.
+VARIANTS = {'thumb': 160, 'card': 640, 'full': 1600}
+FORMATS = {'jpg': 'JPEG', 'webp': 'WEBP'}
+STORED_SUFFIX = '.full.jpg'
+# <sha256 of the upload>.<variant>.<format>; the content never changes under a name.
+STORED_FILENAME = re.compile(r'[0-9a-f]{64}\.(?:%s)\.(?:%s)' % ('|'.join(VARIANTS), '|'.join(FORMATS)))
+
+# Every column that references an uploaded image.
+IMAGE_REFERENCES = (
+    (LostItem, 'image_path'),
+    (FoundItem, 'image_path'),
+    (Post, 'image_path'),
+    (User, 'profile_picture'),
+)
+
+
+def variant_filename(stem, variant, fmt='jpg'):
+    return f'{stem}.{variant}.{fmt}'
+
+
+def is_stored_file(filename):
+    return STORED_FILENAME.fullmatch(filename) is not None
+
+
+def variant_path(image_path, variant='card', fmt='jpg'):
+    """
+    Map a stored image_path to one of its size variants. Files uploaded
+    before the ingestion pipeline have no variants and are returned as-is.
+    """
+    if not image_path or not image_path.endswith(STORED_SUFFIX):
+        return image_path
+    return variant_filename(image_path[:-len(STORED_SUFFIX)], variant, fmt)
+
+
+def _flatten(image):
+    from PIL import Image
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def ingest_image(file, upload_folder):
+    """
+    Store an uploaded image under the SHA-256 of its bytes. New content is
+    decoded, EXIF-oriented and written as thumb/card/full variants in JPEG
+    and WebP without metadata; content that is already stored is reused
+    without touching the disk. Returns the image_path to store, or None if
+    the file is not an image. Pillow is imported here rather than at module
+    load, since most requests never decode an image.
+
+    The bytes are kept on the session until it commits: if the stored
+    files are removed as unreferenced before this upload's row takes its
+    reference, _add_reference writes them again.
+    """
+    data = file.read()
+    stem = hashlib.sha256(data).hexdigest()
+    image_path = variant_filename(stem, 'full', 'jpg')
+    if not all(os.path.exists(os.path.join(upload_folder, path)) for path in _stored_files(image_path)):
+        if not _write_variants(data, stem, upload_folder):
+            return None
+    db.session.info.setdefault('ingested_images', {})[image_path] = data
+    return image_path
+
+
+def _write_variants(data, stem, upload_folder):
+    from PIL import Image, ImageOps, UnidentifiedImageError
+    try:
+        with Image.open(BytesIO(data)) as source:
+            image = _flatten(ImageOps.exif_transpose(source))
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return False
+
+    for variant, max_edge in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        resized.save(os.path.join(upload_folder, variant_filename(stem, variant, 'jpg')),
+                     'JPEG', quality=82, optimize=True, progressive=True)
+        resized.save(os.path.join(upload_folder, variant_filename(stem, variant, 'webp')),
+                     'WEBP', quality=80, method=4)
+    return True
+
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+
+def save_image_upload(file):
+    return ingest_image(file.stream, current_app.config['UPLOAD_FOLDER'])
+
+
+def _stored_files(image_path):
+    if image_path.endswith(STORED_SUFFIX):
+        return [variant_path(image_path, variant, fmt) for variant in VARIANTS for fmt in FORMATS]
+    return [image_path]
+
+
+def delete_image(image_path, upload_folder):
+    """
+    Remove a stored image and all of its variants from disk.
+    """
+    if not image_path:
+        return
+    for path in _stored_files(image_path):
+        full_path = os.path.join(upload_folder, path)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
+
+def _add_reference(connection, target, image_path):
+    table = StoredImage.__table__
+    updated = connection.execute(
+        table.update().where(table.c.image_path == image_path).values(ref_count=table.c.ref_count + 1)
+    )
+    if updated.rowcount:
+        return
+    connection.execute(table.insert().values(image_path=image_path, ref_count=1))
+    # No row means the image was unreferenced, and the cleanup after another
+    # commit may have removed its files after ingest_image found them.
+    # This transaction now holds the row, so files written here stay.
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    if all(os.path.exists(os.path.join(upload_folder, path)) for path in _stored_files(image_path)):
+        return
+    session = db.inspect(target).session
+    data = session.info.get('ingested_images', {}).get(image_path) if session is not None else None
+    if data is not None:
+        _write_variants(data, image_path[:-len(STORED_SUFFIX)], upload_folder)
+
+
+def _drop_reference(connection, target, image_path):
+    table = StoredImage.__table__
+    connection.execute(
+        table.update().where(table.c.image_path == image_path).values(ref_count=table.c.ref_count - 1)
+    )
+    session = db.inspect(target).session
+    if session is not None:
+        session.info.setdefault('released_images', set()).add(image_path)
+
+
+def _register_reference_events(model, column):
+    @db.event.listens_for(model, 'after_insert')
+    def inserted(mapper, connection, target):
+        image_path = getattr(target, column)
+        if image_path:
+            _add_reference(connection, target, image_path)
+
+    @db.event.listens_for(model, 'after_update')
+    def updated(mapper, connection, target):
+        history = db.inspect(target).attrs[column].history
+        if not history.has_changes():
+            return
+        for image_path in history.deleted:
+            if image_path:
+                _drop_reference(connection, target, image_path)
+        for image_path in history.added:
+            if image_path:
+                _add_reference(connection, target, image_path)
+
+    @db.event.listens_for(model, 'after_delete')
+    def deleted(mapper, connection, target):
+        image_path = getattr(target, column)
+        if image_path:
+            _drop_reference(connection, target, image_path)
+
+
+for _model, _column in IMAGE_REFERENCES:
+    _register_reference_events(_model, _column)
+
+
+@db.event.listens_for(Session, 'after_commit')
+def _remove_unreferenced_images(session):
+    session.info.pop('ingested_images', None)
+    released = session.info.pop('released_images', None)
+    if not released:
+        return
+    table = StoredImage.__table__
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    # The files go while the row delete is still uncommitted, so an upload
+    # that re-adds the image waits for it and then sees the files missing.
+    with db.engine.begin() as connection:
+        for image_path in released:
+            removed = connection.execute(
+                table.delete().where((table.c.image_path == image_path) & (table.c.ref_count <= 0))
+            )
+            if removed.rowcount:
+                delete_image(image_path, upload_folder)
+
+
+@db.event.listens_for(Session, 'after_rollback')
+def _forget_released_images(session):
+    session.info.pop('released_images', None)
+    session.info.pop('ingested_images', None)
+
+
+def release_images(session, image_paths):
+    """
+    Drop one reference for each entry in image_paths, for rows removed by a
+    bulk DELETE that skips the mapper events. Images left unreferenced are
+    deleted from disk once the session commits.
+    """
+    counts = Counter(path for path in image_paths if path)
+    if not counts:
+        return
+    table = StoredImage.__table__
+    session.execute(
+        table.update().where(table.c.image_path == db.bindparam('released_path'))
+        .values(ref_count=table.c.ref_count - db.bindparam('released_count')),
+        [{'released_path': path, 'released_count': count} for path, count in counts.items()]
+    )
+    session.info.setdefault('released_images', set()).update(counts)
+
+
+def rebuild_image_references():
+    """
+    Recount image references from every column that stores an upload.
+    """
+    counts = {}
+    for model, column in IMAGE_REFERENCES:
+        attribute = getattr(model, column)
+        rows = db.session.query(attribute, db.func.count()).filter(attribute.isnot(None)).group_by(attribute)
+        for image_path, count in rows:
+            counts[image_path] = counts.get(image_path, 0) + count
+    StoredImage.query.delete()
+    db.session.add_all(StoredImage(image_path=path, ref_count=count) for path, count in counts.items())
+    db.session.commit()
@@ -0,0 +1,393 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, Response, stream_with_context, current_app
+from flask_login import login_required, current_user
+from jinja2 import pass_context
+from models import db, LostItem, FoundItem, Notification, ItemMatchKey
+from extensions import fragment_cache
+from emails import send_email
+from notifications import (add_notifications, latest_notification_id, unread_notification_count,
+                           notifications_after, serialize_notification)
+from fragments import viewer_overlay, render_item_card
+from images import allowed_file, save_image_upload, variant_path, is_stored_file, STORED_SUFFIX, VARIANTS
+from search_index import search_items
+from werkzeug.security import safe_join
+from werkzeug.utils import send_from_directory
+import mimetypes
+import json
+import time
+from datetime import datetime
+import os
+
+items = Blueprint('items', __name__)
+
+@items.app_template_global()
+def image_has_variants(image_path):
+    return bool(image_path) and image_path.endswith(STORED_SUFFIX)
+
+@items.app_template_global()
+def upload_url(image_path, variant='full', fmt='jpg'):
+    return url_for('items.serve_upload', filename=variant_path(image_path, variant, fmt))
+
+@items.app_template_global()
+def upload_srcset(image_path, variants, fmt='jpg'):
+    return ', '.join(f'{upload_url(image_path, variant, fmt)} {VARIANTS[variant]}w' for variant in variants)
+
+@items.app_template_global()
+@pass_context
+def item_card(context, item_type, item):
+    return render_item_card(fragment_cache, viewer_overlay(context), item_type, item)
+
+def find_matching_items(item_name, location, item_type='lost'):
+    search_table = FoundItem if item_type == 'lost' else LostItem
+    candidate_type = 'found' if item_type == 'lost' else 'lost'
+    name_key = ItemMatchKey.normalize(item_name)
+    
+    return search_table.query.join(
+        ItemMatchKey,
+        (ItemMatchKey.item_type == candidate_type) & (ItemMatchKey.item_id == search_table.id)
+    ).filter(
+        ItemMatchKey.location_key == ItemMatchKey.normalize(location),
+        ItemMatchKey.name_overlaps(name_key)
+    ).options(db.joinedload(search_table.user)).order_by(search_table.id).all()
+
+@items.route('/uploads/<filename>')
+def serve_upload(filename):
+    upload_folder = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
+    max_age = current_app.config['UPLOAD_CACHE_MAX_AGE']
+    sendfile_mode = current_app.config.get('UPLOAD_SENDFILE_MODE')
+    etag = filename if is_stored_file(filename) else True
+    
+    if sendfile_mode == 'x-accel-redirect':
+        path = safe_join(upload_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{current_app.config['UPLOAD_ACCEL_PREFIX'].rstrip('/')}/{filename}"
+        response.set_etag(etag if isinstance(etag, str) else f'{os.path.getmtime(path)}-{os.path.getsize(path)}')
+        response.cache_control.max_age = max_age
+        response.make_conditional(request)
+    else:
+        response = send_from_directory(upload_folder, filename, request.environ,
+                                       use_x_sendfile=sendfile_mode == 'x-sendfile',
+                                       response_class=current_app.response_class,
+                                       max_age=max_age, etag=etag, conditional=True)
+    
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@items.route('/dashboard')
+@login_required
+def dashboard():
+    if current_user.role == 'admin':
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    card_limit = current_app.config['DASHBOARD_CARD_LIMIT']
+    lost_items = LostItem.query.order_by(LostItem.date_created.desc()).limit(card_limit).all()
+    found_items = FoundItem.query.order_by(FoundItem.date_created.desc()).limit(card_limit).all()
+    lost_count = db.session.query(db.func.count(LostItem.id)).scalar()
+    found_count = db.session.query(db.func.count(FoundItem.id)).scalar()
+    
+    my_lost_items = LostItem.query.filter_by(user_id=current_user.id).order_by(LostItem.date_created.desc()).limit(card_limit).all()
+    my_found_items = FoundItem.query.filter_by(user_id=current_user.id).order_by(FoundItem.date_created.desc()).limit(card_limit).all()
+    
+    notifications = Notification.query.filter_by(user_id=current_user.id, is_read=False).order_by(Notification.date_created.desc()).limit(5).all()
+    
+    return render_template('dashboard.html', lost_items=lost_items, found_items=found_items, lost_count=lost_count, found_count=found_count,
+                           my_lost_items=my_lost_items, my_found_items=my_found_items, notifications=notifications,
+                           notification_cursor=latest_notification_id(current_user.id))
+
+@items.route('/report-lost', methods=['GET', 'POST'])
+@login_required
+def report_lost():
+    if request.method == 'POST':
+        item_name = request.form.get('item_name')
+        category = request.form.get('category')
+        color = request.form.get('color')
+        model = request.form.get('model')
+        size = request.form.get('size')
+        description = request.form.get('description')
+        date_lost = datetime.strptime(request.form.get('date_lost'), '%Y-%m-%d').date()
+        location = request.form.get('location')
+        
+        image_path = None
+        if 'image' in request.files:
+            file = request.files['image']
+            if file and allowed_file(file.filename):
+                image_path = save_image_upload(file)
+        
+        lost_item = LostItem(
+            user_id=current_user.id,
+            item_name=item_name,
+            category=category,
+            color=color,
+            model=model,
+            size=size,
+            description=description,
+            date_lost=date_lost,
+            location=location,
+            image_path=image_path
+        )
+        db.session.add(lost_item)
+        
+        notifications = []
+        emails = [(current_user.email,
+                  'Lost Item Reported - WeLink',
+                  f'Your lost item "{item_name}" has been reported successfully. We will notify you if someone finds a matching item.')]
+        
+        matching_found_items = find_matching_items(item_name, location, 'lost')
+        for found_item in matching_found_items:
+            notifications.append((current_user.id,
+                f'Potential match found! Someone reported finding a "{found_item.item_name}" at {found_item.location}.'))
+            notifications.append((found_item.user_id,
+                f'Potential match! Someone lost a "{item_name}" at {location} that might match your found item.'))
+            
+            emails.append((current_user.email,
+                'Potential Match Found - WeLink',
+                f'Good news! A "{found_item.item_name}" was found at {found_item.location}. This might be your item!'))
+            emails.append((found_item.user.email,
+                'Potential Match Found - WeLink',
+                f'Someone reported losing a "{item_name}" at {location}. This might match your found item!'))
+        
+        add_notifications(notifications)
+        db.session.commit()
+        
+        for to, subject, body in emails:
+            send_email(to, subject, body)
+        
+        flash('Lost item reported successfully!', 'success')
+        return redirect(url_for('items.dashboard'))
+    
+    return render_template('report_lost.html')
+
+@items.route('/submit-found', methods=['GET', 'POST'])
+@login_required
+def submit_found():
+    if request.method == 'POST':
+        item_name = request.form.get('item_name')
+        category = request.form.get('category')
+        color = request.form.get('color')
+        model = request.form.get('model')
+        size = request.form.get('size')
+        description = request.form.get('description')
+        date_found = datetime.strptime(request.form.get('date_found'), '%Y-%m-%d').date()
+        location = request.form.get('location')
+        
+        image_path = None
+        if 'image' in request.files:
+            file = request.files['image']
+            if file and allowed_file(file.filename):
+                image_path = save_image_upload(file)
+        
+        found_item = FoundItem(
+            user_id=current_user.id,
+            item_name=item_name,
+            category=category,
+            color=color,
+            model=model,
+            size=size,
+            description=description,
+            date_found=date_found,
+            location=location,
+            image_path=image_path
+        )
+        db.session.add(found_item)
+        
+        notifications = []
+        emails = [(current_user.email,
+                  'Found Item Submitted - WeLink',
+                  f'Your found item "{item_name}" has been submitted successfully. Item owners will be notified.')]
+        
+        matching_lost_items = find_matching_items(item_name, location, 'found')
+        for lost_item in matching_lost_items:
+            notifications.append((current_user.id,
+                f'Potential match found! Someone reported losing a "{lost_item.item_name}" at {lost_item.location}.'))
+            notifications.append((lost_item.user_id,
+                f'Great news! Someone found a "{item_name}" at {location} that might be yours!'))
+            
+            emails.append((current_user.email,
+                'Potential Match Found - WeLink',
+                f'Someone lost a "{lost_item.item_name}" at {lost_item.location}. This might match your found item!'))
+            emails.append((lost_item.user.email,
+                'Potential Match Found - WeLink',
+                f'Great news! A "{item_name}" was found at {location}. This might be your lost item!'))
+        
+        add_notifications(notifications)
+        db.session.commit()
+        
+        for to, subject, body in emails:
+            send_email(to, subject, body)
+        
+        flash('Found item submitted successfully!', 'success')
+        return redirect(url_for('items.dashboard'))
+    
+    return render_template('submit_found.html')
+
+@items.route('/mark-returned/<int:item_id>', methods=['POST'])
+@login_required
+def mark_returned(item_id):
+    item = LostItem.query.get_or_404(item_id)
+    if item.user_id != current_user.id:
+        flash('Unauthorized!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    item.status = 'returned'
+    db.session.commit()
+    flash('Item marked as returned!', 'success')
+    return redirect(url_for('items.dashboard'))
+
+@items.route('/mark-claimed/<int:item_id>', methods=['POST'])
+@login_required
+def mark_claimed(item_id):
+    item = FoundItem.query.get_or_404(item_id)
+    if item.user_id != current_user.id:
+        flash('Unauthorized!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    item.status = 'claimed'
+    db.session.commit()
+    flash('Item marked as claimed!', 'success')
+    return redirect(url_for('items.dashboard'))
+
+@items.route('/delete-lost/<int:item_id>', methods=['POST'])
+@login_required
+def delete_lost_item(item_id):
+    item = LostItem.query.get_or_404(item_id)
+    if item.user_id != current_user.id:
+        flash('Unauthorized!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    db.session.delete(item)
+    db.session.commit()
+    flash('Lost item deleted successfully!', 'success')
+    return redirect(url_for('items.dashboard'))
+
+@items.route('/delete-found/<int:item_id>', methods=['POST'])
+@login_required
+def delete_found_item(item_id):
+    item = FoundItem.query.get_or_404(item_id)
+    if item.user_id != current_user.id:
+        flash('Unauthorized!', 'error')
+        return redirect(url_for('items.dashboard'))
+    
+    db.session.delete(item)
+    db.session.commit()
+    flash('Found item deleted successfully!', 'success')
+    return redirect(url_for('items.dashboard'))
+
+@items.route('/notifications/mark-read/<int:notification_id>', methods=['POST'])
+@login_required
+def mark_notification_read(notification_id):
+    notification = Notification.query.get_or_404(notification_id)
+    if notification.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    notification.is_read = True
+    db.session.commit()
+    return jsonify({'success': True})
+
+def read_notification_cursor():
+    value = request.headers.get('Last-Event-ID') or request.args.get('after')
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+def sse_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+@items.route('/notifications/updates')
+@login_required
+def notification_updates():
+    """
+    Polling fallback for clients without EventSource: notifications after
+    the cursor plus the unread count, returned immediately.
+    """
+    after_id = read_notification_cursor()
+    if after_id is None:
+        after_id = latest_notification_id(current_user.id)
+    rows = notifications_after(current_user.id, after_id)
+    return jsonify({
+        'notifications': [serialize_notification(row) for row in rows],
+        'unread': unread_notification_count(current_user.id),
+        'cursor': rows[-1].id if rows else after_id
+    })
+
+@items.route('/notifications/stream')
+@login_required
+def notification_stream():
+    """
+    Server-Sent Events stream of new notifications and the unread count.
+    Each tick is one indexed lookup past the last delivered id; the count
+    is only recounted when something arrives or a heartbeat is due. The
+    stream ends after NOTIFICATION_STREAM_DURATION and the browser resumes
+    from Last-Event-ID.
+    """
+    user_id = current_user.id
+    cursor = read_notification_cursor()
+    interval = current_app.config['NOTIFICATION_STREAM_INTERVAL']
+    heartbeat = current_app.config['NOTIFICATION_STREAM_HEARTBEAT']
+    batch_size = current_app.config['NOTIFICATION_BATCH_SIZE']
+    
+    def events(cursor):
+        deadline = time.monotonic() + current_app.config['NOTIFICATION_STREAM_DURATION']
+        next_count = 0
+        unread = None
+        if cursor is None:
+            cursor = latest_notification_id(user_id)
+        yield f'retry: {int(interval * 1000)}\n\n'
+        
+        while True:
+            rows = notifications_after(user_id, cursor)
+            now = time.monotonic()
+            count = None
+            if rows or now >= next_count:
+                count = unread_notification_count(user_id)
+                next_count = now + heartbeat
+            db.session.close()
+            
+            for row in rows:
+                cursor = row.id
+                yield sse_event('notification', serialize_notification(row), row.id)
+            if count is not None and count != unread:
+                unread = count
+                yield sse_event('unread', {'unread': unread})
+            elif count is not None:
+                yield ': keepalive\n\n'
+            
+            if now >= deadline:
+                return
+            if len(rows) < batch_size:
+                time.sleep(interval)
+    
+    return Response(stream_with_context(events(cursor)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@items.route('/search')
+@login_required
+def search():
+    query = request.args.get('q', '')
+    item_type = request.args.get('type', 'all')
+    location = request.args.get('location', '')
+    per_page = current_app.config['SEARCH_PAGE_SIZE']
+    
+    lost_items = None
+    found_items = None
+    
+    if item_type in ['all', 'lost']:
+        lost_items = search_items(LostItem, query, location).paginate(
+            page=request.args.get('lost_page', 1, type=int), per_page=per_page, error_out=False)
+    
+    if item_type in ['all', 'found']:
+        found_items = search_items(FoundItem, query, location).paginate(
+            page=request.args.get('found_page', 1, type=int), per_page=per_page, error_out=False)
+    
+    def page_url(param, page):
+        args = request.args.to_dict()
+        args[param] = page
+        return url_for('items.search', **args)
+    
+    return render_template('search_results.html', lost_items=lost_items, found_items=found_items, query=query,
+                           item_type=item_type, location=location, page_url=page_url)
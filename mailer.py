@@ -0,0 +1,204 @@
+import threading
+import time
+import atexit
+from queue import Queue, LifoQueue, Empty, Full
+from flask import current_app
+
+
+class PooledConnection:
+    def __init__(self, server):
+        self.server = server
+        self.last_used = time.monotonic()
+        self.messages_sent = 0
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class _PoolState:
+    """
+    The idle connections and send slots of one app's pool.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        pool_size = max(1, int(config.get('MAIL_POOL_SIZE', 2)))
+        self.idle = LifoQueue(maxsize=pool_size)
+        self.slots = threading.BoundedSemaphore(pool_size)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except Empty:
+                return
+            conn.close()
+
+
+class SMTPConnectionPool:
+    """
+    Keeps authenticated SMTP connections open and reuses them across
+    messages instead of doing a full connect/STARTTLS/login per email.
+
+    Connections are dropped once they have been idle longer than
+    MAIL_POOL_IDLE_TIMEOUT or have sent MAIL_MAX_MESSAGES_PER_CONNECTION
+    messages. A send that fails because the server hung up is retried once
+    on a fresh connection. smtplib is imported on first use, so workers
+    that never send mail do not load it. Each app bound with init_app has
+    its own connections, kept in app.extensions['smtp_pool'].
+    """
+
+    def __init__(self, app=None, observe=None):
+        self.observe = observe
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        state = _PoolState(app.config)
+        app.extensions['smtp_pool'] = state
+        atexit.register(state.close_all)
+
+    def _state(self):
+        return current_app.extensions['smtp_pool']
+
+    def open_connection(self):
+        import smtplib
+        config = self._state().config
+        server_name = config['MAIL_SERVER']
+        port = config['MAIL_PORT']
+        timeout = config.get('MAIL_TIMEOUT', 30)
+
+        if config.get('MAIL_USE_SSL', False):
+            server = smtplib.SMTP_SSL(server_name, port, timeout=timeout)
+        else:
+            server = smtplib.SMTP(server_name, port, timeout=timeout)
+            if config.get('MAIL_USE_TLS', True):
+                server.starttls()
+
+        username = config.get('MAIL_USERNAME')
+        if username:
+            password = (config.get('MAIL_PASSWORD') or '').replace(' ', '')
+            try:
+                server.login(username, password)
+            except Exception:
+                server.close()
+                raise
+        return server
+
+    def _acquire(self, state):
+        idle_timeout = state.config.get('MAIL_POOL_IDLE_TIMEOUT', 60)
+        while True:
+            try:
+                conn = state.idle.get_nowait()
+            except Empty:
+                return PooledConnection(self.open_connection())
+            if time.monotonic() - conn.last_used < idle_timeout:
+                return conn
+            conn.close()
+
+    def _release(self, state, conn):
+        max_messages = state.config.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100)
+        if conn.messages_sent >= max_messages:
+            conn.close()
+            return
+        conn.last_used = time.monotonic()
+        try:
+            state.idle.put_nowait(conn)
+        except Full:
+            conn.close()
+
+    def send_message(self, msg):
+        """
+        Send one message, reporting its duration and outcome ('sent' or
+        'failed') to observe(seconds, outcome) when that is set.
+        """
+        if self.observe is None:
+            return self._send_message(msg)
+        started = time.perf_counter()
+        outcome = 'failed'
+        try:
+            self._send_message(msg)
+            outcome = 'sent'
+        finally:
+            self.observe(time.perf_counter() - started, outcome)
+
+    def _send_message(self, msg):
+        import smtplib
+        retryable_errors = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+        state = self._state()
+        with state.slots:
+            for attempt in range(2):
+                conn = self._acquire(state)
+                try:
+                    conn.server.send_message(msg)
+                except smtplib.SMTPRecipientsRefused:
+                    self._release(state, conn)
+                    raise
+                except retryable_errors:
+                    conn.close()
+                    if attempt:
+                        raise
+                    continue
+                except smtplib.SMTPResponseException as e:
+                    conn.close()
+                    if attempt or e.smtp_code != 421:
+                        raise
+                    continue
+                except Exception:
+                    conn.close()
+                    raise
+                conn.messages_sent += 1
+                self._release(state, conn)
+                return
+
+    def close_all(self):
+        self._state().close_all()
+
+
+class MailQueue:
+    """
+    Hands messages to a background thread that sends them through the
+    pool, so a request can queue hundreds of emails and return at once.
+    The queue lives in memory: messages still waiting when the process
+    exits are lost. Each message is sent in the context of the app that
+    queued it.
+    """
+
+    def __init__(self, send, maxsize=10000):
+        self._send = send
+        self._queue = Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+                self._thread.start()
+
+    def put(self, msg):
+        self._start()
+        self._queue.put((current_app._get_current_object(), msg))
+
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def join(self):
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            app, msg = self._queue.get()
+            try:
+                with app.app_context():
+                    self._send(msg)
+            except Exception as e:
+                print(f"Queued email to {msg['To']} failed: {e}")
+            finally:
+                self._queue.task_done()
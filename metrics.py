@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import defaultdict
+from flask import request, g, has_request_context
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_QUERY_TEXT_LIMIT = 2000
+
+
+class Histogram:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket', dict(labels, le=repr(bound)), cumulative
+        yield f'{name}_bucket', dict(labels, le='+Inf'), self.count
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+def _value_text(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class RequestMetrics:
+    """
+    Per-process request metrics: wall time, status codes, SQL statement
+    counts and time per endpoint, slow statements, SMTP send durations and
+    upload bytes. Collected from Flask's request hooks and SQLAlchemy
+    engine events, and rendered in the Prometheus text format. Each
+    worker process keeps its own numbers.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_query_seconds = 0.2
+        self.logger = None
+        self._lock = threading.Lock()
+        self._durations = defaultdict(Histogram)
+        self._requests = defaultdict(int)
+        self._sql_statements = defaultdict(int)
+        self._sql_seconds = defaultdict(float)
+        self._sql_per_request = defaultdict(lambda: Histogram((1, 2, 5, 10, 20, 50, 100, 250)))
+        self._slow_queries = defaultdict(int)
+        self._smtp = defaultdict(Histogram)
+        self._upload_bytes = defaultdict(int)
+        self._uploads = defaultdict(int)
+        self._stats_sources = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) / 1000.0
+        self.logger = app.logger
+        app.extensions['request_metrics'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+
+    def instrument_engine(self, engine):
+        if not self.enabled:
+            return
+        from sqlalchemy import event
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def register_stats(self, prefix, source):
+        """
+        Export the numeric values of the dict returned by source() as
+        welink_<prefix>_<key> gauges.
+        """
+        self._stats_sources[prefix] = source
+
+    def _endpoint(self):
+        rule = request.url_rule
+        return rule.endpoint if rule is not None else 'unmatched'
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_statements = 0
+        g.metrics_sql_seconds = 0.0
+
+    def _record_status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _finish_request(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        endpoint = self._endpoint()
+        method = request.method
+        status = g.pop('metrics_status', 500)
+        statements = g.pop('metrics_sql_statements', 0)
+        sql_seconds = g.pop('metrics_sql_seconds', 0.0)
+        upload_bytes = request.content_length if request.mimetype == 'multipart/form-data' else None
+
+        with self._lock:
+            self._durations[(endpoint, method)].observe(elapsed)
+            self._requests[(endpoint, method, status)] += 1
+            self._sql_statements[endpoint] += statements
+            self._sql_seconds[endpoint] += sql_seconds
+            self._sql_per_request[endpoint].observe(statements)
+            if upload_bytes:
+                self._upload_bytes[endpoint] += upload_bytes
+                self._uploads[endpoint] += 1
+
+    # The start time lives on the execution context, which is dropped with
+    # the statement, so a statement that raises leaves nothing behind.
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        endpoint = None
+        if has_request_context() and 'metrics_started' in g:
+            g.metrics_sql_statements += 1
+            g.metrics_sql_seconds += elapsed
+            endpoint = self._endpoint()
+        if elapsed >= self.slow_query_seconds:
+            endpoint = endpoint or 'none'
+            with self._lock:
+                self._slow_queries[endpoint] += 1
+            self.logger.warning('Slow query (%.1f ms, endpoint %s): %s', elapsed * 1000, endpoint,
+                                ' '.join(statement.split())[:SLOW_QUERY_TEXT_LIMIT])
+
+    def observe_smtp(self, seconds, outcome):
+        with self._lock:
+            self._smtp[outcome].observe(seconds)
+
+    def _families(self):
+        with self._lock:
+            yield ('welink_request_duration_seconds', 'histogram', 'Request wall time by endpoint.',
+                   [sample for (endpoint, method), histogram in sorted(self._durations.items())
+                    for sample in histogram.samples('welink_request_duration_seconds',
+                                                    {'endpoint': endpoint, 'method': method})])
+            yield ('welink_requests_total', 'counter', 'Requests by endpoint, method and status.',
+                   [('welink_requests_total', {'endpoint': endpoint, 'method': method, 'status': status}, count)
+                    for (endpoint, method, status), count in sorted(self._requests.items())])
+            yield ('welink_request_sql_statements_total', 'counter', 'SQL statements run by requests to an endpoint.',
+                   [('welink_request_sql_statements_total', {'endpoint': endpoint}, count)
+                    for endpoint, count in sorted(self._sql_statements.items())])
+            yield ('welink_request_sql_statements', 'histogram', 'SQL statements per request.',
+                   [sample for endpoint, histogram in sorted(self._sql_per_request.items())
+                    for sample in histogram.samples('welink_request_sql_statements', {'endpoint': endpoint})])
+            yield ('welink_request_sql_seconds_total', 'counter', 'Time spent in SQL by requests to an endpoint.',
+                   [('welink_request_sql_seconds_total', {'endpoint': endpoint}, seconds)
+                    for endpoint, seconds in sorted(self._sql_seconds.items())])
+            yield ('welink_slow_queries_total', 'counter',
+                   f'SQL statements slower than {self.slow_query_seconds * 1000:g} ms.',
+                   [('welink_slow_queries_total', {'endpoint': endpoint}, count)
+                    for endpoint, count in sorted(self._slow_queries.items())])
+            yield ('welink_smtp_send_seconds', 'histogram', 'SMTP send time by outcome.',
+                   [sample for outcome, histogram in sorted(self._smtp.items())
+                    for sample in histogram.samples('welink_smtp_send_seconds', {'outcome': outcome})])
+            yield ('welink_upload_bytes_total', 'counter', 'Bytes received in multipart uploads.',
+                   [('welink_upload_bytes_total', {'endpoint': endpoint}, count)
+                    for endpoint, count in sorted(self._upload_bytes.items())])
+            yield ('welink_uploads_total', 'counter', 'Multipart upload requests.',
+                   [('welink_uploads_total', {'endpoint': endpoint}, count)
+                    for endpoint, count in sorted(self._uploads.items())])
+
+        for prefix, source in list(self._stats_sources.items()):
+            for key, value in source().items():
+                if isinstance(value, (int, float)):
+                    name = f'welink_{prefix}_{key}'
+                    yield name, 'gauge', f'{prefix} {key.replace("_", " ")}.', [(name, {}, value)]
+
+    def render(self):
+        lines = []
+        for name, kind, help_text, samples in self._families():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{_label_text(labels)} {_value_text(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,127 @@
+from datetime import datetime
+from models import db, User, LostItem, FoundItem, Notification, Post, Comment, PostLike, CommentReaction, ItemMatchKey, refresh_counters
+from search_index import create_search_index
+from table_versions import create_table_versions
+from images import rebuild_image_references
+
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.metadata,
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(100), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """
+    Register a schema migration. Migrations run once each, in version
+    order, and must be safe to re-run if one is interrupted part way.
+    """
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return fn
+    return register
+
+
+def add_column(model, column_name):
+    """
+    ALTER TABLE ... ADD COLUMN for a model column the database lacks.
+    """
+    table = model.__table__
+    existing = {column['name'] for column in db.inspect(db.engine).get_columns(table.name)}
+    if column_name in existing:
+        return False
+
+    column = table.c[column_name]
+    ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=db.engine.dialect)}'
+    if column.server_default is not None:
+        ddl += f' DEFAULT {column.server_default.arg}'
+        if not column.nullable:
+            ddl += ' NOT NULL'
+    with db.engine.begin() as connection:
+        connection.execute(db.text(ddl))
+    return True
+
+
+def create_indexes(*models):
+    for model in models:
+        for index in model.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+@migration(1, 'initial_schema')
+def initial_schema():
+    db.create_all()
+
+
+@migration(2, 'like_and_reaction_counters')
+def like_and_reaction_counters():
+    add_column(Post, 'likes_count')
+    add_column(Comment, 'reactions_count')
+    refresh_counters('likes_count', 'reactions_count')
+
+
+@migration(3, 'item_match_keys')
+def item_match_keys():
+    ItemMatchKey.rebuild()
+
+
+@migration(4, 'full_text_search')
+def full_text_search():
+    create_search_index()
+
+
+@migration(5, 'stored_image_references')
+def stored_image_references():
+    rebuild_image_references()
+
+
+@migration(6, 'query_indexes')
+def query_indexes():
+    create_indexes(User, LostItem, FoundItem, Notification, Post, Comment, PostLike, CommentReaction)
+
+
+@migration(7, 'notification_cursor_index')
+def notification_cursor_index():
+    create_indexes(Notification)
+
+
+@migration(8, 'post_comment_counters')
+def post_comment_counters():
+    add_column(Post, 'comments_count')
+    refresh_counters('comments_count')
+
+
+@migration(9, 'table_versions')
+def table_versions():
+    create_table_versions()
+
+
+def applied_versions():
+    schema_migrations.create(bind=db.engine, checkfirst=True)
+    with db.engine.connect() as connection:
+        return {row.version for row in connection.execute(db.select(schema_migrations.c.version))}
+
+
+def upgrade():
+    """
+    Apply every migration the database has not seen yet and return the
+    (version, name) pairs that ran.
+    """
+    done = applied_versions()
+    ran = []
+    for version, name, fn in MIGRATIONS:
+        if version in done:
+            continue
+        fn()
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        ran.append((version, name))
+    return ran
@@ -1,10 +1,32 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from passwords import hash_password, verify_password, needs_rehash
 from datetime import datetime
 
 db = SQLAlchemy()
 
+
+class substring_position(FunctionElement):
+    """
+    1-based position of the second argument inside the first, 0 if absent.
+    """
+    type = db.Integer()
+    name = 'substring_position'
+    inherit_cache = True
+
+
+@compiles(substring_position)
+def _compile_instr(element, compiler, **kw):
+    return f'instr({compiler.process(element.clauses, **kw)})'
+
+
+@compiles(substring_position, 'postgresql')
+def _compile_strpos(element, compiler, **kw):
+    return f'strpos({compiler.process(element.clauses, **kw)})'
+
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     
@@ -19,6 +41,11 @@ class User(UserMixin, db.Model):
     profile_picture = db.Column(db.String(255))
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_users_role_approved', 'role', 'account_approved'),
+        db.Index('ix_users_created', 'date_created'),
+    )
+    
     lost_items = db.relationship('LostItem', backref='user', lazy=True, cascade='all, delete-orphan')
     found_items = db.relationship('FoundItem', backref='user', lazy=True, cascade='all, delete-orphan')
     notifications = db.relationship('Notification', backref='user', lazy=True, cascade='all, delete-orphan')
@@ -27,10 +54,13 @@ class User(UserMixin, db.Model):
     post_likes = db.relationship('PostLike', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
     
     def __repr__(self):
         return f'<User {self.student_number}>'
@@ -52,6 +82,12 @@ class LostItem(db.Model):
     status = db.Column(db.String(20), default='pending')
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_lost_items_user_created', 'user_id', 'date_created'),
+        db.Index('ix_lost_items_status_created', 'status', 'date_created'),
+        db.Index('ix_lost_items_created', 'date_created'),
+    )
+    
     def __repr__(self):
         return f'<LostItem {self.item_name}>'
 
@@ -72,6 +108,12 @@ class FoundItem(db.Model):
     status = db.Column(db.String(20), default='pending')
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_found_items_user_created', 'user_id', 'date_created'),
+        db.Index('ix_found_items_status_created', 'status', 'date_created'),
+        db.Index('ix_found_items_created', 'date_created'),
+    )
+    
     def __repr__(self):
         return f'<FoundItem {self.item_name}>'
 
@@ -84,9 +126,71 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_notifications_user_unread', 'user_id', 'is_read', 'date_created'),
+        db.Index('ix_notifications_user_id', 'user_id', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Notification {self.id}>'
 
+class StoredImage(db.Model):
+    __tablename__ = 'stored_images'
+    
+    image_path = db.Column(db.String(255), primary_key=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<StoredImage {self.image_path} x{self.ref_count}>'
+
+class ItemMatchKey(db.Model):
+    __tablename__ = 'item_match_keys'
+    
+    item_type = db.Column(db.String(10), primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+    location_key = db.Column(db.String(100), nullable=False)
+    name_key = db.Column(db.String(100), nullable=False)
+    
+    __table_args__ = (db.Index('ix_item_match_keys_lookup', 'item_type', 'location_key'),)
+    
+    @staticmethod
+    def normalize(value):
+        return (value or '').lower()
+    
+    @classmethod
+    def name_overlaps(cls, name_key):
+        """
+        True when either name contains the other.
+        """
+        return (substring_position(cls.name_key, name_key) > 0) | (substring_position(name_key, cls.name_key) > 0)
+    
+    @classmethod
+    def rebuild(cls):
+        """
+        Repopulate the match index from the pending lost and found items.
+        """
+        cls.query.delete()
+        for item_type, model in MATCHABLE_ITEMS.items():
+            for item in model.query.filter_by(status='pending'):
+                db.session.add(cls(
+                    item_type=item_type,
+                    item_id=item.id,
+                    location_key=cls.normalize(item.location),
+                    name_key=cls.normalize(item.item_name)
+                ))
+        db.session.commit()
+    
+    @classmethod
+    def discard(cls, item_type, item_ids):
+        """
+        Drop the keys for items that a bulk UPDATE or DELETE took out of
+        matching, since those statements skip the mapper events.
+        """
+        db.session.execute(db.delete(cls).where(cls.item_type == item_type, cls.item_id.in_(item_ids)))
+    
+    def __repr__(self):
+        return f'<ItemMatchKey {self.item_type}:{self.item_id}>'
+
 class Post(db.Model):
     __tablename__ = 'posts'
     
@@ -94,17 +198,18 @@ class Post(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     image_path = db.Column(db.String(255))
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_posts_created', 'date_created', 'id'),
+        db.Index('ix_posts_user', 'user_id'),
+    )
+    
     comments = db.relationship('Comment', backref='post', lazy=True, cascade='all, delete-orphan')
     likes = db.relationship('PostLike', backref='post', lazy=True, cascade='all, delete-orphan')
     
-    def get_likes_count(self):
-        return len(self.likes)
-    
-    def is_liked_by(self, user_id):
-        return any(like.user_id == user_id for like in self.likes)
-    
     def __repr__(self):
         return f'<Post {self.id}>'
 
@@ -115,15 +220,15 @@ class Comment(db.Model):
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
+    reactions_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
-    reactions = db.relationship('CommentReaction', backref='comment', lazy=True, cascade='all, delete-orphan')
-    
-    def get_reactions_count(self):
-        return len(self.reactions)
+    __table_args__ = (
+        db.Index('ix_comments_post_created', 'post_id', 'date_created'),
+        db.Index('ix_comments_user', 'user_id'),
+    )
     
-    def is_reacted_by(self, user_id):
-        return any(reaction.user_id == user_id for reaction in self.reactions)
+    reactions = db.relationship('CommentReaction', backref='comment', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Comment {self.id}>'
@@ -136,7 +241,10 @@ class PostLike(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('post_id', 'user_id', name='unique_post_like'),)
+    __table_args__ = (
+        db.UniqueConstraint('post_id', 'user_id', name='unique_post_like'),
+        db.Index('ix_post_likes_user', 'user_id'),
+    )
     
     def __repr__(self):
         return f'<PostLike {self.id}>'
@@ -149,7 +257,96 @@ class CommentReaction(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('comment_id', 'user_id', name='unique_comment_reaction'),)
+    __table_args__ = (
+        db.UniqueConstraint('comment_id', 'user_id', name='unique_comment_reaction'),
+        db.Index('ix_comment_reactions_user', 'user_id'),
+    )
     
     def __repr__(self):
         return f'<CommentReaction {self.id}>'
+
+MATCHABLE_ITEMS = {'lost': LostItem, 'found': FoundItem}
+
+
+def _sync_match_key(connection, item_type, target):
+    """
+    Keep the item_match_keys row for an item in step with its status:
+    only pending items are match candidates.
+    """
+    table = ItemMatchKey.__table__
+    connection.execute(table.delete().where(
+        (table.c.item_type == item_type) & (table.c.item_id == target.id)
+    ))
+    if (target.status or 'pending') == 'pending':
+        connection.execute(table.insert().values(
+            item_type=item_type,
+            item_id=target.id,
+            location_key=ItemMatchKey.normalize(target.location),
+            name_key=ItemMatchKey.normalize(target.item_name)
+        ))
+
+
+def _register_match_key_events(item_type, model):
+    @db.event.listens_for(model, 'after_insert')
+    @db.event.listens_for(model, 'after_update')
+    def sync(mapper, connection, target):
+        _sync_match_key(connection, item_type, target)
+    
+    @db.event.listens_for(model, 'after_delete')
+    def remove(mapper, connection, target):
+        table = ItemMatchKey.__table__
+        connection.execute(table.delete().where(
+            (table.c.item_type == item_type) & (table.c.item_id == target.id)
+        ))
+
+
+for _item_type, _model in MATCHABLE_ITEMS.items():
+    _register_match_key_events(_item_type, _model)
+
+
+COUNTERS = {}
+
+
+def _register_counter_events(model, parent_table, counter_column, foreign_key):
+    """
+    Keep a denormalized counter on the parent row in step with inserts and
+    deletes of model rows, inside the same flush as the change itself.
+    """
+    counter = parent_table.c[counter_column]
+    COUNTERS[counter_column] = (model, parent_table, foreign_key)
+    
+    def adjust(connection, target, delta):
+        connection.execute(
+            parent_table.update()
+            .where(parent_table.c.id == getattr(target, foreign_key))
+            .values({counter: counter + delta})
+        )
+    
+    @db.event.listens_for(model, 'after_insert')
+    def increment(mapper, connection, target):
+        adjust(connection, target, 1)
+    
+    @db.event.listens_for(model, 'after_delete')
+    def decrement(mapper, connection, target):
+        adjust(connection, target, -1)
+
+
+_register_counter_events(PostLike, Post.__table__, 'likes_count', 'post_id')
+_register_counter_events(Comment, Post.__table__, 'comments_count', 'post_id')
+_register_counter_events(CommentReaction, Comment.__table__, 'reactions_count', 'comment_id')
+
+
+def refresh_counters(*counter_columns):
+    """
+    Recompute the named counters, or every registered one, from the
+    underlying rows.
+    """
+    for counter_column in counter_columns or COUNTERS:
+        model, parent_table, foreign_key = COUNTERS[counter_column]
+        db.session.execute(parent_table.update().values({counter_column: (
+            db.select(db.func.count(model.id))
+            .where(getattr(model, foreign_key) == parent_table.c.id)
+            .scalar_subquery()
+        )}))
+    db.session.commit()
+
@@ -0,0 +1,42 @@
+from flask import current_app
+from models import db, Notification
+
+
+def add_notifications(notifications):
+    """
+    Queue (user_id, message) pairs as one bulk INSERT in the current
+    transaction. The caller commits them together with the change that
+    triggered them.
+    """
+    rows = [{'user_id': user_id, 'message': message} for user_id, message in notifications]
+    if rows:
+        db.session.execute(db.insert(Notification), rows)
+
+
+def create_notification(user_id, message):
+    add_notifications([(user_id, message)])
+    db.session.commit()
+
+
+def latest_notification_id(user_id):
+    return db.session.query(db.func.coalesce(db.func.max(Notification.id), 0)).filter_by(user_id=user_id).scalar()
+
+
+def unread_notification_count(user_id):
+    return db.session.query(db.func.count(Notification.id)).filter_by(user_id=user_id, is_read=False).scalar()
+
+
+def notifications_after(user_id, after_id):
+    """
+    Notifications newer than the cursor, oldest first, at most one batch.
+    """
+    return db.session.execute(
+        db.select(Notification.id, Notification.message, Notification.date_created)
+        .where(Notification.user_id == user_id, Notification.id > after_id)
+        .order_by(Notification.id)
+        .limit(current_app.config['NOTIFICATION_BATCH_SIZE'])
+    ).all()
+
+
+def serialize_notification(row):
+    return {'id': row.id, 'message': row.message, 'date_created': row.date_created.isoformat()}
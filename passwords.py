@@ -0,0 +1,86 @@
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+
+# Werkzeug's defaults for parameters a configured method may leave out.
+METHOD_DEFAULTS = {
+    'scrypt': ['32768', '8', '1'],
+    'pbkdf2': ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)],
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def hash_method_prefix(method):
+    """
+    Spell out a Werkzeug hash method with all of its parameters, the way it
+    is recorded at the front of a stored hash.
+    """
+    name, *params = method.split(':')
+    defaults = METHOD_DEFAULTS.get(name, [])
+    return ':'.join([name] + params + defaults[len(params):])
+
+
+def hash_password(password):
+    return generate_password_hash(
+        password,
+        method=_config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+        salt_length=_config('PASSWORD_SALT_LENGTH', 16)
+    )
+
+
+def hash_passwords(passwords):
+    """
+    Hash a batch of passwords, spread over PASSWORD_HASH_WORKERS threads
+    when that is set.
+    """
+    hash_one = partial(
+        generate_password_hash,
+        method=_config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+        salt_length=_config('PASSWORD_SALT_LENGTH', 16)
+    )
+    workers = _config('PASSWORD_HASH_WORKERS', 0)
+    if not workers:
+        return [hash_one(password) for password in passwords]
+    return list(_hash_executor(workers).map(hash_one, passwords))
+
+
+def needs_rehash(password_hash):
+    """
+    True when a stored hash was made with a method or cost other than the
+    configured one.
+    """
+    stored_method = password_hash.split('$', 1)[0]
+    return stored_method != hash_method_prefix(_config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD))
+
+
+def _hash_executor(workers):
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor
+
+
+def verify_password(password_hash, password):
+    """
+    Check a password against its hash. With PASSWORD_HASH_WORKERS set, the
+    check runs on a pool of that many threads, which caps how many hashes
+    this process computes at once; other logins queue for a free thread.
+    """
+    workers = _config('PASSWORD_HASH_WORKERS', 0)
+    if not workers:
+        return check_password_hash(password_hash, password)
+    return _hash_executor(workers).submit(check_password_hash, password_hash, password).result()
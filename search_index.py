@@ -0,0 +1,121 @@
+import re
+from models import db, LostItem, FoundItem
+
+SEARCHABLE_ITEMS = (LostItem, FoundItem)
+
+# Relative BM25 weights for the item_name, description and location columns.
+BM25_WEIGHTS = '10.0, 1.0, 2.0'
+
+_fts_available = None
+
+
+def fts_table_name(model):
+    return f'{model.__tablename__}_fts'
+
+
+def create_search_index():
+    """
+    Create the FTS5 tables over lost and found items, plus the triggers
+    that keep them in step with inserts, updates and deletes. Newly created
+    tables are filled from the existing rows.
+    """
+    global _fts_available
+    if db.engine.dialect.name != 'sqlite':
+        _fts_available = False
+        return False
+
+    with db.engine.begin() as connection:
+        for model in SEARCHABLE_ITEMS:
+            table = model.__tablename__
+            fts = fts_table_name(model)
+            exists = connection.execute(
+                db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': fts}
+            ).first()
+            connection.execute(db.text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"item_name, description, location, "
+                f"content='{table}', content_rowid='id', prefix='2 3 4')"
+            ))
+            connection.execute(db.text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, item_name, description, location) "
+                f"VALUES (new.id, new.item_name, new.description, new.location); END"
+            ))
+            connection.execute(db.text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, item_name, description, location) "
+                f"VALUES ('delete', old.id, old.item_name, old.description, old.location); END"
+            ))
+            connection.execute(db.text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF item_name, description, location ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, item_name, description, location) "
+                f"VALUES ('delete', old.id, old.item_name, old.description, old.location); "
+                f"INSERT INTO {fts}(rowid, item_name, description, location) "
+                f"VALUES (new.id, new.item_name, new.description, new.location); END"
+            ))
+            if not exists:
+                connection.execute(db.text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+    _fts_available = True
+    return True
+
+
+def fts_available():
+    global _fts_available
+    if _fts_available is None:
+        if db.engine.dialect.name != 'sqlite':
+            _fts_available = False
+        else:
+            inspector = db.inspect(db.engine)
+            _fts_available = all(inspector.has_table(fts_table_name(model)) for model in SEARCHABLE_ITEMS)
+    return _fts_available
+
+
+def _prefix_terms(text):
+    return [f'"{term}"*' for term in re.findall(r'\w+', text or '')]
+
+
+def build_match_expression(query, location):
+    """
+    Turn free-text input into an FTS5 MATCH expression: every word must
+    appear as a prefix, search terms in the name or description and
+    location terms in the location.
+    """
+    clauses = []
+    terms = _prefix_terms(query)
+    if terms:
+        clauses.append('{item_name description} : (' + ' AND '.join(terms) + ')')
+    location_terms = _prefix_terms(location)
+    if location_terms:
+        clauses.append('location : (' + ' AND '.join(location_terms) + ')')
+    return ' AND '.join(clauses)
+
+
+def search_items(model, query, location):
+    """
+    Return a query for items of model matching the search, ordered by
+    relevance when full-text search is available and by date otherwise.
+    """
+    match = build_match_expression(query, location)
+    if not match and not (query or location):
+        return model.query.order_by(model.date_created.desc(), model.id.desc())
+
+    if fts_available():
+        if not match:
+            return model.query.filter(db.false())
+        fts = fts_table_name(model)
+        fts_table = db.table(fts, db.column('rowid'))
+        return model.query.join(fts_table, fts_table.c.rowid == model.id).filter(
+            db.literal_column(fts).op('MATCH')(match)
+        ).order_by(db.text(f'bm25({fts}, {BM25_WEIGHTS})'), model.date_created.desc())
+
+    search_query = model.query
+    if query:
+        search_query = search_query.filter(
+            (model.item_name.ilike(f'%{query}%')) |
+            (model.description.ilike(f'%{query}%'))
+        )
+    if location:
+        search_query = search_query.filter(model.location.ilike(f'%{location}%'))
+    return search_query.order_by(model.date_created.desc(), model.id.desc())
@@ -0,0 +1,34 @@
+import sqlite3
+import threading
+
+
+class SQLiteFileStore:
+    """
+    Base for the small stores kept in a SQLite file that every worker
+    process on the host shares. Each thread gets its own autocommit
+    connection in WAL mode. The schema is created on a throwaway
+    connection, so none is held open when a pre-fork server forks.
+    """
+
+    SCHEMA = None
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        connection = self._open()
+        try:
+            connection.execute(self.SCHEMA)
+        finally:
+            connection.close()
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._open()
+        return connection
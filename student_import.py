@@ -0,0 +1,134 @@
+import csv
+import io
+import secrets
+import string
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+from forms import StudentImportRowForm
+from models import db, User
+from passwords import hash_passwords
+
+REQUIRED_COLUMNS = ('student_number', 'name', 'email')
+ROW_FIELDS = REQUIRED_COLUMNS + ('temp_password',)
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = []
+        self.errors = []
+        self.missing_columns = []
+
+    def add_error(self, line, student_number, message):
+        self.errors.append((line, student_number, message))
+
+
+def generate_temp_password():
+    """
+    A random temporary password that passes validate_password_strength.
+    """
+    return (secrets.token_urlsafe(9) + secrets.choice(string.ascii_uppercase)
+            + secrets.choice('!@#$%^&*'))
+
+
+def _taken(column, values):
+    return set(db.session.execute(db.select(column).where(column.in_(values))).scalars())
+
+
+def _insert_chunk(chunk, report):
+    taken_numbers = _taken(User.student_number, [data['student_number'] for _, data in chunk])
+    taken_emails = _taken(User.email, [data['email'] for _, data in chunk])
+
+    accepted = []
+    for line, data in chunk:
+        if data['student_number'] in taken_numbers:
+            report.add_error(line, data['student_number'], 'Student number already exists.')
+        elif data['email'] in taken_emails:
+            report.add_error(line, data['student_number'], 'Email already exists.')
+        else:
+            data['temp_password'] = data['temp_password'] or generate_temp_password()
+            accepted.append((line, data))
+    if not accepted:
+        return
+
+    hashes = hash_passwords([data['temp_password'] for _, data in accepted])
+    values = [{
+        'student_number': data['student_number'],
+        'name': data['name'],
+        'email': data['email'],
+        'password_hash': password_hash,
+        'role': 'user',
+        'must_change_password': True,
+        'account_approved': True,
+    } for (_, data), password_hash in zip(accepted, hashes)]
+
+    try:
+        db.session.execute(db.insert(User), values)
+        db.session.commit()
+        report.created.extend(data for _, data in accepted)
+        return
+    except IntegrityError:
+        db.session.rollback()
+
+    # An account was created elsewhere since the lookup; find which rows clash.
+    for (line, data), row in zip(accepted, values):
+        try:
+            db.session.execute(db.insert(User), [row])
+            db.session.commit()
+            report.created.append(data)
+        except IntegrityError:
+            db.session.rollback()
+            report.add_error(line, data['student_number'], 'Student number or email already exists.')
+
+
+def import_students(stream, chunk_size=500):
+    """
+    Create student accounts from a CSV stream with student_number, name,
+    email and an optional temp_password column. Rows are validated with
+    the AdminCreateStudentForm rules, checked for duplicates within the
+    file and against the database one chunk at a time, and inserted a
+    chunk per statement. Returns an ImportReport; report.created holds the
+    accepted rows, including their temporary passwords, for the welcome
+    emails.
+    """
+    report = ImportReport()
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    seen_numbers = set()
+    seen_emails = set()
+    chunk = []
+
+    try:
+        fieldnames = [name.strip() for name in reader.fieldnames or []]
+        report.missing_columns = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+        if report.missing_columns:
+            return report
+        reader.fieldnames = fieldnames
+
+        for row in reader:
+            line = reader.line_num
+            report.rows += 1
+            data = {field: (row.get(field) or '').strip() for field in ROW_FIELDS}
+            form = StudentImportRowForm(formdata=MultiDict(data))
+            if not form.validate():
+                messages = [message for errors in form.errors.values() for message in errors]
+                report.add_error(line, data['student_number'], ' '.join(messages))
+                continue
+            if data['student_number'] in seen_numbers:
+                report.add_error(line, data['student_number'], 'Student number appears earlier in the file.')
+                continue
+            if data['email'] in seen_emails:
+                report.add_error(line, data['student_number'], 'Email appears earlier in the file.')
+                continue
+            seen_numbers.add(data['student_number'])
+            seen_emails.add(data['email'])
+
+            chunk.append((line, data))
+            if len(chunk) >= chunk_size:
+                _insert_chunk(chunk, report)
+                chunk = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        report.add_error(reader.line_num, '', f'The file could not be read past this line: {e}')
+
+    if chunk:
+        _insert_chunk(chunk, report)
+    return report
@@ -0,0 +1,58 @@
+from models import db, User, LostItem, FoundItem, Post, PostLike, Notification
+
+# Tables whose rows the JSON API returns, directly or through a join.
+VERSIONED_TABLES = (User, LostItem, FoundItem, Post, PostLike, Notification)
+
+_versions_available = None
+
+
+def create_table_versions():
+    """
+    Create the table_versions table and the triggers that bump a table's
+    version on every insert, update and delete, so a reader can tell
+    whether anything in the table changed with one primary key lookup.
+    """
+    global _versions_available
+    if db.engine.dialect.name != 'sqlite':
+        _versions_available = False
+        return False
+
+    with db.engine.begin() as connection:
+        connection.execute(db.text(
+            'CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)'
+        ))
+        for model in VERSIONED_TABLES:
+            table = model.__tablename__
+            connection.execute(db.text('INSERT OR IGNORE INTO table_versions (name) VALUES (:name)'), {'name': table})
+            for event in ('insert', 'update', 'delete'):
+                connection.execute(db.text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event} AFTER {event.upper()} ON {table} BEGIN "
+                    f"UPDATE table_versions SET version = version + 1 WHERE name = '{table}'; END"
+                ))
+
+    _versions_available = True
+    return True
+
+
+def versions_available():
+    global _versions_available
+    if _versions_available is None:
+        _versions_available = db.engine.dialect.name == 'sqlite' and db.inspect(db.engine).has_table('table_versions')
+    return _versions_available
+
+
+def table_versions(tables):
+    """
+    The current version of each named table, in name order, or None when
+    the database has no version triggers.
+    """
+    if not versions_available():
+        return None
+    rows = db.session.execute(
+        db.text('SELECT name, version FROM table_versions WHERE name IN :names')
+        .bindparams(db.bindparam('names', expanding=True)),
+        {'names': sorted(tables)}
+    ).all()
+    if len(rows) != len(tables):
+        return None
+    return tuple(sorted(rows))
@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlite_store import SQLiteFileStore
+
+
+class MemoryBucketStore:
+    """
+    Token buckets held in this process. The least recently used keys are
+    dropped once more than max_keys are tracked.
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_per_second, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    def give_back(self, key, capacity):
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(capacity, tokens + 1), updated)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBucketStore(SQLiteFileStore):
+    """
+    Token buckets in a small SQLite file so every worker process on the
+    host draws from the same buckets. Each take is one IMMEDIATE
+    transaction; buckets idle for an hour are pruned now and then.
+    """
+
+    PRUNE_EVERY = 500
+    SCHEMA = ('CREATE TABLE IF NOT EXISTS login_buckets '
+              '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def __init__(self, path):
+        self._takes = 0
+        super().__init__(path)
+
+    def take(self, key, capacity, refill_per_second, now):
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM login_buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            connection.execute(
+                'INSERT INTO login_buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                (key, tokens, now)
+            )
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                connection.execute('DELETE FROM login_buckets WHERE updated < ?', (now - 3600,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return allowed, tokens
+
+    def give_back(self, key, capacity):
+        self._connect().execute('UPDATE login_buckets SET tokens = MIN(?, tokens + 1) WHERE key = ?', (capacity, key))
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM login_buckets').fetchone()[0]
+
+
+class _ThrottleState:
+    """
+    The limits, bucket store and counters of one app's throttle.
+    """
+
+    def __init__(self, config):
+        self._lock = threading.Lock()
+        self.enabled = config.get('LOGIN_THROTTLE_ENABLED', True)
+        self.limits = {
+            'ip': (config.get('LOGIN_THROTTLE_IP_BURST', 20), config.get('LOGIN_THROTTLE_IP_PER_MINUTE', 10) / 60.0),
+            'identifier': (config.get('LOGIN_THROTTLE_IDENTIFIER_BURST', 5), config.get('LOGIN_THROTTLE_IDENTIFIER_PER_MINUTE', 2) / 60.0),
+        }
+        for kind, (capacity, refill) in self.limits.items():
+            if capacity < 1 or refill <= 0:
+                raise ValueError(f'LOGIN_THROTTLE_{kind.upper()}_BURST must be at least 1 and '
+                                 f'LOGIN_THROTTLE_{kind.upper()}_PER_MINUTE greater than 0')
+        storage = config.get('LOGIN_THROTTLE_STORAGE')
+        self.store = SQLiteBucketStore(storage) if storage else MemoryBucketStore(config.get('LOGIN_THROTTLE_MAX_KEYS', 10000))
+        self._counters = {'allowed': 0, 'rejected_ip': 0, 'rejected_identifier': 0, 'refunded': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _keys(self, ip, identifier):
+        return (('ip', f'ip:{ip}'), ('identifier', f'id:{(identifier or "").strip().lower()}'))
+
+    def check(self, ip, identifier):
+        if not self.enabled:
+            return 0
+        now = time.time()
+        for kind, key in self._keys(ip, identifier):
+            capacity, refill = self.limits[kind]
+            allowed, tokens = self.store.take(key, capacity, refill, now)
+            if not allowed:
+                self._count(f'rejected_{kind}')
+                return max(1, int((1 - tokens) / refill) + 1)
+        self._count('allowed')
+        return 0
+
+    def refund(self, ip, identifier):
+        if not self.enabled:
+            return
+        for kind, key in self._keys(ip, identifier):
+            self.store.give_back(key, self.limits[kind][0])
+        self._count('refunded')
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['tracked_keys'] = len(self.store)
+        stats['storage'] = 'sqlite' if isinstance(self.store, SQLiteBucketStore) else 'memory'
+        return stats
+
+
+class LoginThrottle:
+    """
+    Token-bucket limits on login attempts, one bucket per client IP and one
+    per submitted identifier. The check runs before the user lookup and the
+    password hash, so a credential-stuffing burst is turned away without
+    spending CPU on it. A login whose password is correct gets its tokens
+    back, so only failed attempts count against the limits. Each app bound with init_app has its own buckets,
+    kept in app.extensions['login_throttle'].
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['login_throttle'] = _ThrottleState(app.config)
+
+    def _state(self):
+        return current_app.extensions['login_throttle']
+
+    def check(self, ip, identifier):
+        """
+        Spend one token from the IP bucket and one from the identifier
+        bucket. Returns 0 if the attempt may proceed, otherwise the number
+        of seconds until it may be retried.
+        """
+        return self._state().check(ip, identifier)
+
+    def refund(self, ip, identifier):
+        """
+        Return the tokens check() spent, once the password has been verified.
+        """
+        self._state().refund(ip, identifier)
+
+    def metrics(self):
+        return self._state().metrics()
@@ -0,0 +1,22 @@
+"""
+WSGI entry point for a pre-fork server:
+
+    flask --app wsgi upgrade-db
+    gunicorn --workers 4 --preload --bind 0.0.0.0:5000 wsgi:app
+
+Migrations run once, before the workers start, rather than in every
+worker. With --preload the master imports this module and builds the app
+once; the workers are forked from it and share the imported code, so a
+new worker is serving within milliseconds. create_app() leaves no database
+or SMTP connection open, so nothing is shared across the fork: each worker
+opens its own connections on its first request. Modules only some requests
+need (smtplib and the email classes, Pillow) are imported on first use.
+
+Behind a reverse proxy such as nginx, set PROXY_FIX_X_FOR to the number
+of proxies in front of the app (usually 1). request.remote_addr is then
+the client's address from X-Forwarded-For; without it every login counts
+against the proxy's address in the login throttle.
+"""
+from app import create_app
+
+app = create_app()